@@ -1,19 +1,25 @@
-from flask import Flask, jsonify, request
+from services import startup
+from flask import Response, jsonify
 from flask_cors import CORS
 from routes.investment_routes import investment_bp
 from routes.user import user_bp
 from routes.fraud_routes import fraud_bp
-from PyPDF2 import PdfReader
-import re
+from routes.transaction_routes import transaction_bp
+from routes.tax_routes import tax_bp
+from routes.statement_routes import statement_bp, get_statement_jobs
 import json
+import logging
 import os
+import time
 
 
 from routes.chat_routes import chat_bp
-from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+from services import metrics
+from services.async_runtime import AsyncFlask
 from dotenv import load_dotenv
 
+llm_cache = startup.lazy_import("services.llm_cache")
+
 # Load environment variables
 load_dotenv()
 
@@ -32,160 +38,71 @@ def load_json_data():
 # Initialize global data
 json_data = load_json_data()
 
-app = Flask(__name__)
-CORS(app)
-app.secret_key = os.getenv("FLASK_SECRET_KEY", "your-default-secret-key-for-development")
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(investment_bp, url_prefix='/api/investment')
-app.register_blueprint(fraud_bp, url_prefix='/api/fraud')
-app.register_blueprint(chat_bp, url_prefix='/api/chat')
-
-# Get API key from environment variables
-groq_api_key = os.getenv('GROQ_API_KEY')
-llm = ChatGroq(temperature=1, model_name="llama-3.3-70b-versatile", groq_api_key=groq_api_key)
-
-# Transaction Extraction Template
-extraction_template = """
-Analyze the following bank statement text and extract all transactions with:
-- Date (YYYY-MM-DD format)
-- Description
-- Amount (numeric value only)
-- Type (income/expense)
-
-Format the output as a JSON array. Example:
-[
-  {{
-    "date": "2024-05-01",
-    "description": "Salary Credit",
-    "amount": 75000,
-    "type": "income"
-  }}
-]
-
-Statement Text:
-{text}
-"""
-
-extraction_prompt = PromptTemplate.from_template(extraction_template)
-
-# Categorization Template
-categories = [
-    "Food", "Transport", "Housing", "Utilities", 
-    "Entertainment", "Healthcare", "Education", "Other"
-]
-
-categorization_template = """
-Categorize this transaction into one of these categories: {categories}
-
-Transaction Details:
-- Date: {date}
-- Description: {description}
-- Amount: {amount}
-- Type: {type}
-
-Respond only with the category name. Do not include any other text.
-"""
-
-categorization_prompt = PromptTemplate.from_template(categorization_template)
-
-def process_pdf(file):
-    try:
-        # Extract text from PDF
-        reader = PdfReader(file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        
-        # Extract transactions
-        extraction_chain = extraction_prompt | llm
-        raw_transactions = extraction_chain.invoke({"text": text}).content
-        
-        # Clean and parse JSON
-        json_match = re.search(r'\[.*\]', raw_transactions, re.DOTALL)
-        if not json_match:
-            raise ValueError("No valid transactions found in response")
-        
-        transactions = eval(json_match.group(0))
-        
-        # Categorize transactions
-        categorized_transactions = []
-        for txn in transactions:
-            chain = categorization_prompt | llm
-            category = chain.invoke({
-                "date": txn["date"],
-                "description": txn["description"],
-                "amount": txn["amount"],
-                "type": txn["type"],
-                "categories": ", ".join(categories)
-            }).content.strip()
-            
-            txn["category"] = category
-            categorized_transactions.append(txn)
-        
-        # Calculate financial analysis
-        analysis = calculate_analysis(categorized_transactions)
-        
-        return {
-            "transactions": categorized_transactions,
-            "analysis": analysis
-        }
-        
-    except Exception as e:
-        raise RuntimeError(f"PDF processing failed: {str(e)}")
-
-def calculate_analysis(transactions):
-    analysis = {
-        "total_income": 0,
-        "total_expenses": 0,
-        "categories": {},
-        "expense_to_income_ratio": 0,
-        "category_percentages": {}
-    }
-    
-    for txn in transactions:
-        amount = float(txn["amount"])
-        if txn["type"] == "income":
-            analysis["total_income"] += amount
-        else:
-            analysis["total_expenses"] += amount
-            category = txn["category"]
-            analysis["categories"][category] = analysis["categories"].get(category, 0) + amount
-            
-    if analysis["total_income"] > 0:
-        analysis["expense_to_income_ratio"] = round(
-            (analysis["total_expenses"] / analysis["total_income"]) * 100, 2
-        )
-        
-        for category, amount in analysis["categories"].items():
-            analysis["category_percentages"][category] = round(
-                (amount / analysis["total_income"]) * 100, 2
-            )
-    
-    return analysis
-
-@app.route('/api/process-statement', methods=['POST'])
-def process_statement():
-    if 'file' not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
-        
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({"error": "Empty file name"}), 400
-        
-    try:
-        result = process_pdf(file)
-        return jsonify({
-            "success": True,
-            "transaction_count": len(result["transactions"]),
-            "transactions": result["transactions"],
-            "financial_analysis": result["analysis"]
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+def warmup_tasks():
+    """LLM clients and indexes built ahead of the first request"""
+    # Lambdas, so nothing is imported until warm-up actually runs
+    pipeline = startup.lazy_import("services.statement_pipeline")
+    advisor = startup.lazy_import("services.investment_advisor")
+    chat = startup.lazy_import("services.chat_service")
+    tax = startup.lazy_import("services.tax_processor")
+    fraud = startup.lazy_import("services.fraud_detector")
+    return [
+        ("statement_llm", lambda: pipeline.get_statement_llm()),
+        ("categorization_cache", lambda: pipeline.get_categorization_cache()),
+        ("investment_advisor", lambda: advisor.get_investment_advisor()),
+        ("chat_service", lambda: chat.get_chat_service()),
+        ("tax_processor", lambda: tax.get_tax_processor()),
+        ("fraud_llm", lambda: fraud.get_fraud_llm())
+    ]
+
+def create_app(warmup=None):
+    """Build the app. Heavy modules and LLM clients load on first use unless
+    warm-up is on: warmup (or STARTUP_WARMUP) is off, sync or background"""
+    started = time.perf_counter()
+    startup.record_phase("import", startup.since_import())
+
+    # async def views (the LLM-bound routes) run on one shared event loop
+    app = AsyncFlask(__name__)
+    CORS(app)
+    app.secret_key = os.getenv("FLASK_SECRET_KEY", "your-default-secret-key-for-development")
+    metrics.init_app(app)
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(investment_bp, url_prefix='/api/investment')
+    app.register_blueprint(fraud_bp, url_prefix='/api/fraud')
+    app.register_blueprint(chat_bp, url_prefix='/api/chat')
+    app.register_blueprint(transaction_bp, url_prefix='/api/transactions')
+    app.register_blueprint(tax_bp, url_prefix='/api/tax')
+    app.register_blueprint(statement_bp, url_prefix='/api/process-statement')
+
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    @app.route('/api/llm-cache/stats', methods=['GET'])
+    def llm_cache_stats():
+        return jsonify({"success": True, **llm_cache.get_response_cache().stats()})
+
+    @app.route('/api/startup', methods=['GET'])
+    def startup_stats():
+        return jsonify({"success": True, **startup.startup_report()})
+
+    @app.after_request
+    def record_first_request(response):
+        startup.record_first_request()
+        return response
+
+    # Queued jobs, and jobs whose previous owner died (lease expired), are picked up here
+    get_statement_jobs().start()
+    startup.record_phase("create_app", time.perf_counter() - started)
+
+    mode = startup.warmup_mode(warmup)
+    if mode != "off":
+        startup.warm_up(warmup_tasks(), mode)
+    logging.info(f"Startup report: {json.dumps(startup.startup_report())}")
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,85 @@
+# benchmarks/data_scaler.py
+from datetime import datetime, timedelta
+import json
+import os
+import random
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(_BACKEND_DIR, 'data', 'Daily Household Transactions.json')
+
+_DATE_FORMATS = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y"]
+_OUT_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+
+def _parse(value):
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def scaled_records(rows, seed=0, source=SOURCE):
+    """Yield `rows` records shaped like the bundled history.
+
+    The history is replayed back to back, each copy shifted past the end of
+    the previous one so dates keep increasing, with amounts jittered by up
+    to 10% so copies aren't exact duplicates.
+    """
+    with open(source) as f:
+        base = json.load(f)
+    dates = [_parse(record["Date"]) for record in base]
+    known = [d for d in dates if d]
+    span = (max(known) - min(known)) + timedelta(days=1)
+    rng = random.Random(seed)
+
+    produced = 0
+    copy = 0
+    while produced < rows:
+        shift = span * copy
+        for record, date in zip(base, dates):
+            if produced >= rows:
+                return
+            scaled = dict(record)
+            if date:
+                scaled["Date"] = (date + shift).strftime(_OUT_FORMAT)
+            if copy:
+                scaled["Amount"] = round(float(record["Amount"]) * rng.uniform(0.9, 1.1), 2)
+            produced += 1
+            yield scaled
+        copy += 1
+
+
+def as_fraud_history(records, users=1):
+    """Map history records to the amount/category/merchant/timestamp rows
+    BehaviorAnalyzer and the fraud services work on, spread over `users`"""
+    for i, record in enumerate(records):
+        date = _parse(record["Date"])
+        yield {
+            "user_id": f"user-{i % users}",
+            "amount": float(record["Amount"]),
+            "category": record.get("Category") or "Other",
+            "merchant": record.get("Subcategory") or record.get("Mode") or "",
+            "timestamp": (date or datetime(2018, 1, 1)).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+
+def write_scaled(path, rows, seed=0):
+    """Stream a scaled history to a JSON array without holding it in memory"""
+    with open(path, "w") as f:
+        f.write("[")
+        for i, record in enumerate(scaled_records(rows, seed)):
+            f.write(("," if i else "") + "\n" + json.dumps(record))
+        f.write("\n]\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scale the household transaction history")
+    parser.add_argument("out")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_scaled(args.out, args.rows, args.seed)
@@ -0,0 +1,146 @@
+# benchmarks/fake_llm.py
+import asyncio
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_ID_RE = re.compile(r'"id":\s*(\d+)')
+
+_FRAUD_ANALYSIS = {
+    "pattern_changes": [], "risk_factors": [], "unusual_categories": [],
+    "timing_anomalies": [], "amount_anomalies": [], "overall_risk": "low", "recommendations": []
+}
+
+_CHAT_REPLY = (
+    "Based on your recent spending, groceries and transport make up most of your monthly outflow. "
+    "Setting aside a fixed amount on payday and reviewing subscriptions each quarter would free up "
+    "room for an emergency fund before adding new investments."
+)
+
+
+def _ids(prompt):
+    return [int(i) for i in _ID_RE.findall(prompt)]
+
+
+def canned_response(prompt):
+    """Plausible output for each prompt this backend sends, chosen by its wording"""
+    if "Statement Text:" in prompt:
+        return json.dumps([
+            {"date": "2024-05-01", "description": "Salary Credit", "amount": 75000, "type": "income"},
+            {"date": "2024-05-03", "description": "Grocery Store", "amount": 2450.5, "type": "expense"},
+            {"date": "2024-05-05", "description": "Electricity Bill", "amount": 1830, "type": "expense"}
+        ])
+    if "Categorize each of these transactions" in prompt:
+        return json.dumps({str(i): "Food" for i in _ids(prompt)})
+    if "Categorize this transaction" in prompt:
+        return "Food"
+    if "tax deduction section" in prompt:
+        return json.dumps({str(i): None for i in _ids(prompt)})
+    if "behavior analysis" in prompt or "statistical digest" in prompt:
+        return json.dumps(_FRAUD_ANALYSIS)
+    if "Analyze this transaction" in prompt:
+        return json.dumps({
+            "risk_score": 20, "is_anomalous": False, "primary_reason": "Consistent with past behavior",
+            "supporting_evidence": "", "confidence": 0.8
+        })
+    if "SHORTLIST:" in prompt:
+        names = re.findall(r'"name":"([^"]+)"', prompt)
+        return json.dumps({"recommendations": [
+            {"scheme": name, "reasons": [f"{name} fits the stated goals"]} for name in names
+        ]})
+    if "running summary" in prompt:
+        return "The user asked about budgeting and saving; advice covered groceries, transport and an emergency fund."
+    return _CHAT_REPLY
+
+
+class FakeChatGroq(BaseChatModel):
+    """Deterministic offline stand-in for GroqChat.
+
+    Accepts the same constructor arguments as services.llm.create_llm passes,
+    so it can replace GroqChat wholesale. Each call waits `latency` seconds
+    (time to first token) plus one token interval per output token, where a
+    token is roughly four characters. `responses` maps prompt substrings to
+    fixed outputs and overrides the canned ones.
+    """
+
+    service: str = "default"
+    model_name: str = "fake-groq"
+    temperature: float = 0.7
+    groq_api_key: Optional[str] = None
+    latency: float = 0.2
+    tokens_per_second: float = 250.0
+    responses: Dict[str, str] = {}
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-groq"
+
+    def _get_llm_string(self, stop=None, **kwargs):
+        return json.dumps({
+            "service": self.service,
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "stop": stop,
+            **kwargs
+        }, sort_keys=True, default=str)
+
+    def _respond(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        self.calls += 1
+        for needle, text in self.responses.items():
+            if needle in prompt:
+                return text
+        return canned_response(prompt)
+
+    def _tokens(self, text):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def _result(self, messages, text):
+        # Same token_usage shape ChatGroq reports, so the LLM metrics fill in
+        prompt_tokens = sum(len(self._tokens(str(message.content))) for message in messages)
+        completion_tokens = len(self._tokens(text))
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }, "model_name": self.model_name}
+        )
+
+    def _generate(self, messages: List[Any], stop=None, run_manager=None, **kwargs):
+        text = self._respond(messages)
+        time.sleep(self.latency + len(self._tokens(text)) / self.tokens_per_second)
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[Any], stop=None, run_manager=None, **kwargs):
+        # Native coroutine, like ChatGroq's async client, so waits don't hold a thread
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency + len(self._tokens(text)) / self.tokens_per_second)
+        return self._result(messages, text)
+
+    def _stream(self, messages: List[Any], stop=None, run_manager=None, **kwargs):
+        text = self._respond(messages)
+        time.sleep(self.latency)
+        for token in self._tokens(text):
+            time.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[Any], stop=None, run_manager=None, **kwargs):
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency)
+        for token in self._tokens(text):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
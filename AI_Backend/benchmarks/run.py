@@ -0,0 +1,294 @@
+# benchmarks/run.py
+"""Offline benchmarks for the Flask endpoints and heavy services.
+
+Every LLM client is swapped for benchmarks.fake_llm.FakeChatGroq, so runs
+cost no API quota and are repeatable. Run from AI_Backend:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenarios tax_simulate,chat_message --save benchmarks/baselines/main.json
+    python -m benchmarks.run --compare benchmarks/baselines/main.json
+
+--compare exits non-zero when a scenario got slower than --threshold.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure(workdir, latency, tokens_per_second):
+    """Point every on-disk cache at workdir and install the fake LLM.
+
+    Must run before app or any service module builds its clients.
+    """
+    for name, sub in (
+        ("JOB_QUEUE_PATH", "jobs"),
+        ("MODEL_REGISTRY_PATH", "models"),
+        ("TRANSACTION_STORE_PATH", "transaction_store"),
+        ("CATEGORY_CACHE_PATH", "categorization.sqlite3"),
+        ("LLM_CACHE_PATH", "llm_responses.sqlite3")
+    ):
+        os.environ[name] = os.path.join(workdir, sub)
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+    import services.llm
+    from benchmarks.fake_llm import FakeChatGroq
+    services.llm.GroqChat = functools.partial(FakeChatGroq, latency=latency, tokens_per_second=tokens_per_second)
+
+
+# --- scenarios -----------------------------------------------------------
+# Each scenario takes the shared context and returns a zero-argument callable
+# that performs one request; it may take a client from the thread-local pool.
+
+_local = threading.local()
+
+
+def _client(app):
+    if getattr(_local, "client", None) is None:
+        _local.client = app.test_client()
+    return _local.client
+
+
+def _ok(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def scenario_process_statement(ctx):
+    from benchmarks.synthetic_pdf import generate_statement_pdf
+    from io import BytesIO
+
+    # Every third page is prose, so the LLM extraction path is exercised too
+    pdf = generate_statement_pdf(transactions=200, seed=1, freeform_every=3)
+    return lambda: _ok(_client(ctx["app"]).post(
+        "/api/process-statement",
+        data={"file": (BytesIO(pdf), "statement.pdf")},
+        content_type="multipart/form-data"
+    ))
+
+
+def scenario_chat_message(ctx):
+    counter = iter(range(10 ** 9))
+    return lambda: _ok(_client(ctx["app"]).post("/api/chat/message", json={
+        "message": "How can I cut my monthly grocery spend?",
+        "session_id": f"bench-{next(counter) % 50}"
+    }))
+
+
+def _profile():
+    return {"age": 35, "income": 1200000, "risk_tolerance": "Moderate", "goals": ["Retirement", "Tax saving"]}
+
+
+def scenario_investment_recommendations(ctx):
+    return lambda: _ok(_client(ctx["app"]).post("/api/investment/get-recommendations", json=_profile()))
+
+
+def scenario_investment_scores(ctx):
+    return lambda: _ok(_client(ctx["app"]).post("/api/investment/get-recommendations?mode=scores", json=_profile()))
+
+
+def scenario_tax_calculate(ctx):
+    from benchmarks.synthetic_pdf import NARRATIONS
+    transactions = [
+        {"description": NARRATIONS[i % len(NARRATIONS)][1].format(ref=i), "amount": 1000 + i,
+         "type": NARRATIONS[i % len(NARRATIONS)][0]}
+        for i in range(500)
+    ] + [{"description": "HDFC HOME LOAN EMI", "amount": 30000, "type": "expense"}]
+    return lambda: _ok(_client(ctx["app"]).post("/api/tax/calculate-tax", json={
+        "total_income": 1500000, "transactions": transactions
+    }))
+
+
+def scenario_tax_simulate(ctx):
+    scenarios = [
+        {"income": 300000 + 250 * i, "deductions": {"80C": (i * 37) % 150000, "80D": (i * 11) % 25000},
+         "fy": ("FY2024", "FY2025", "FY2026")[i % 3]}
+        for i in range(10000)
+    ]
+    return lambda: _ok(_client(ctx["app"]).post("/api/tax/simulate", json={"scenarios": scenarios}))
+
+
+def scenario_fraud_batch(ctx):
+    from benchmarks.data_scaler import scaled_records, as_fraud_history
+    rows = list(as_fraud_history(scaled_records(10000), users=100))
+    return lambda: _ok(_client(ctx["app"]).post("/api/fraud/analyze-batch", json=rows))
+
+
+def scenario_behavior_analyzer(ctx):
+    from benchmarks.data_scaler import scaled_records, as_fraud_history
+    from models.behavior_analysis import BehaviorAnalyzer
+    history = list(as_fraud_history(scaled_records(ctx["rows"])))
+
+    def run():
+        analyzer = BehaviorAnalyzer("bench")
+        analyzer.transaction_history = history
+        analyzer.train_model()
+        analyzer.detect_anomalies()
+    return run
+
+
+def scenario_cold_start(ctx):
+    # A fresh interpreter imports the app and serves one request
+    code = "import app; app.app.test_client().get('/api/process-statement/queue')"
+    return lambda: subprocess.run(
+        [sys.executable, "-c", code], cwd=_BACKEND_DIR, env=os.environ, check=True, capture_output=True
+    )
+
+
+SCENARIOS = {
+    "process_statement": (scenario_process_statement, 10),
+    "chat_message": (scenario_chat_message, 20),
+    "investment_recommendations": (scenario_investment_recommendations, 20),
+    "investment_scores": (scenario_investment_scores, 50),
+    "tax_calculate": (scenario_tax_calculate, 20),
+    "tax_simulate": (scenario_tax_simulate, 10),
+    "fraud_batch": (scenario_fraud_batch, 10),
+    "behavior_analyzer": (scenario_behavior_analyzer, 3),
+    "cold_start": (scenario_cold_start, 5)
+}
+
+
+# --- measurement ---------------------------------------------------------
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def measure_latency(fn, iterations, warmup=1):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "iterations": iterations,
+        "mean": round(statistics.fmean(samples), 3),
+        "p50": round(_percentile(samples, 50), 3),
+        "p90": round(_percentile(samples, 90), 3),
+        "p99": round(_percentile(samples, 99), 3),
+        "max": round(max(samples), 3)
+    }
+
+
+def measure_throughput(fn, concurrency, requests):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(fn) for _ in range(requests)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "requests": requests, "requests_per_sec": round(requests / elapsed, 3)}
+
+
+def measure_memory(fn):
+    """Peak Python allocation during one call, in MiB"""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2 ** 20, 3)
+
+
+def run(names, iterations=None, concurrency=4, rows=100000, latency=0.2, tokens_per_second=250.0):
+    workdir = tempfile.mkdtemp(prefix="coinwise-bench-")
+    configure(workdir, latency, tokens_per_second)
+    # Imported only after configure() so the fake LLM is in place
+    from app import app
+
+    ctx = {"app": app, "rows": rows}
+    results = {}
+    for name in names:
+        factory, default_iterations = SCENARIOS[name]
+        fn = factory(ctx)
+        count = iterations or default_iterations
+        print(f"{name}: {count} iterations...", file=sys.stderr)
+        results[name] = {
+            "latency_ms": measure_latency(fn, count),
+            "throughput": measure_throughput(fn, concurrency, max(count, concurrency)),
+            "peak_memory_mib": measure_memory(fn)
+        }
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fake_llm": {"latency": latency, "tokens_per_second": tokens_per_second},
+            "behavior_rows": rows,
+            # ru_maxrss is KiB on Linux
+            "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        },
+        "scenarios": results
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print p50 latency and throughput changes; return the regressed scenarios"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        p50_change = result["latency_ms"]["p50"] / before["latency_ms"]["p50"] - 1
+        rps_change = result["throughput"]["requests_per_sec"] / before["throughput"]["requests_per_sec"] - 1
+        print(f"{name:28s} p50 {p50_change:+7.1%}  rps {rps_change:+7.1%}")
+        if p50_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--iterations", type=int, help="override every scenario's iteration count")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=100000, help="history size for behavior_analyzer")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM time to first token (s)")
+    parser.add_argument("--tps", type=float, default=250.0, help="fake LLM tokens per second")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = run(names, args.iterations, args.concurrency, args.rows, args.latency, args.tps)
+    print(json.dumps(results, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/synthetic_pdf.py
+from datetime import date, timedelta
+from io import BytesIO
+import random
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+NARRATIONS = [
+    ("expense", "UPI-SWIGGY-{ref}", 150, 1200),
+    ("expense", "UPI-BIGBASKET GROCERY-{ref}", 400, 4000),
+    ("expense", "POS AMAZON PAY {ref}", 200, 9000),
+    ("expense", "NEFT ELECTRICITY BOARD {ref}", 900, 3500),
+    ("expense", "ACH LIC INSURANCE PREMIUM {ref}", 2000, 6000),
+    ("expense", "ATM WDL {ref}", 500, 10000),
+    ("expense", "UPI-UBER INDIA-{ref}", 90, 800),
+    ("income", "NEFT SALARY ACME CORP {ref}", 60000, 90000),
+    ("income", "IMPS REFUND {ref}", 100, 2500)
+]
+
+ROWS_PER_PAGE = 40
+
+
+def _rows(count, seed, start=date(2024, 4, 1), opening_balance=50000.0):
+    rng = random.Random(seed)
+    balance = opening_balance
+    day = start
+    for _ in range(count):
+        kind, template, low, high = rng.choice(NARRATIONS)
+        amount = round(rng.uniform(low, high), 2)
+        # Keep the balance positive so every row reconciles
+        if kind == "expense" and amount > balance:
+            kind, template, low, high = NARRATIONS[7]
+            amount = round(rng.uniform(low, high), 2)
+        balance = round(balance + amount if kind == "income" else balance - amount, 2)
+        day += timedelta(days=rng.random() < 0.4)
+        yield day, template.format(ref=rng.randint(10 ** 9, 10 ** 10 - 1)), kind, amount, balance
+
+
+def _money(value):
+    return f"{value:,.2f}"
+
+
+def generate_statement_pdf(transactions=200, seed=0, freeform_every=0, opening_balance=50000.0):
+    """A bank statement PDF in Date | Narration | Debit | Credit | Balance layout.
+
+    Rows reconcile against the running balance, so the local layout parsers
+    read every page. With freeform_every=n, every n-th page is written as
+    prose no parser recognises, which sends it down the LLM extraction path.
+    """
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    rows = list(_rows(transactions, seed, opening_balance=opening_balance))
+
+    for page, start in enumerate(range(0, len(rows), ROWS_PER_PAGE), start=1):
+        pdf.setFont("Helvetica", 8)
+        y = 800
+        pdf.drawString(40, y, f"SYNTHETIC BANK LTD - Account Statement - Page {page}")
+        y -= 20
+        freeform = freeform_every and page % freeform_every == 0
+        if page == 1:
+            pdf.drawString(40, y, f"Opening Balance {_money(opening_balance)}")
+            y -= 14
+        for day, narration, kind, amount, balance in rows[start:start + ROWS_PER_PAGE]:
+            if freeform:
+                line = f"On {day:%d %B %Y} you {'received' if kind == 'income' else 'paid'} Rs {amount} ({narration})"
+            else:
+                debit = _money(amount) if kind == "expense" else "-"
+                credit = _money(amount) if kind == "income" else "-"
+                line = f"{day:%d/%m/%Y} {narration} {debit} {credit} {_money(balance)}"
+            pdf.drawString(40, y, line)
+            y -= 18
+        pdf.showPage()
+
+    pdf.save()
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic bank statement PDF")
+    parser.add_argument("out")
+    parser.add_argument("--transactions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--freeform-every", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.out, "wb") as f:
+        f.write(generate_statement_pdf(args.transactions, args.seed, args.freeform_every))
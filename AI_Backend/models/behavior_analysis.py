@@ -3,19 +3,21 @@ import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from datetime import datetime
-import json
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+CATEGORY_RISK = {'Food': 1, 'Utilities': 2, 'Electronics': 5}
+BUSINESS_HOURS = (9, 18)
+FEATURE_COLUMNS = ['amount_norm', 'hour', 'day_of_week', 'category_risk', 'category_z']
 
 class BehaviorAnalyzer:
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.scaler = StandardScaler()
-        self.model = IsolationForest(n_estimators=100, contamination=0.05)
+        self.model = None  # built by train_model or loaded from the model registry
+        self.category_stats = None  # per-category amount mean/std, fitted with the scaler
         self.transaction_history = self._load_transaction_data()
-        
+
     def _load_transaction_data(self) -> List[Dict]:
         """Fetch last 6 months transactions from Firestore"""
         # Example mock data - Replace with Firestore query
@@ -27,71 +29,115 @@ class BehaviorAnalyzer:
             {"amount": 15000, "category": "Education", "timestamp": "2024-05-07 09:30:00"},
             {"amount": 8000, "category": "Healthcare", "timestamp": "2024-05-10 11:20:00"}
         ]
-    def _extract_features(self) -> pd.DataFrame:
-        """Convert raw transactions to ML features"""
-        df = pd.DataFrame(self.transaction_history)
-        
+
+    def _extract_features(self, transactions: Optional[List[Dict]] = None, fit: bool = False) -> pd.DataFrame:
+        """Convert raw transactions to ML features.
+
+        With fit=True the scaler and per-category statistics are learned from
+        this data; otherwise the ones from the last fit are reused so scoring
+        never shifts the baseline.
+        """
+        df = pd.DataFrame(transactions if transactions is not None else self.transaction_history)
+        amounts = df[['amount']].astype(float)
+
         # Feature Engineering
-        df['hour'] = df['timestamp'].apply(lambda x: datetime.strptime(x, "%Y-%m-%d %H:%M:%S").hour)
-        df['amount_norm'] = self.scaler.fit_transform(df[['amount']])
-        df['category_risk'] = df['category'].map({
-            'Food': 1, 'Utilities': 2, 'Electronics': 5
-        }).fillna(3)  # Risk score 1-5
-        
-        return df[['amount_norm', 'hour', 'category_risk']]
-    
+        timestamps = pd.to_datetime(df['timestamp'], format="%Y-%m-%d %H:%M:%S")
+        if fit or self.category_stats is None:
+            self.scaler.fit(amounts)
+            self.category_stats = amounts['amount'].groupby(df['category']).agg(['mean', 'std'])
+
+        features = pd.DataFrame(index=df.index)
+        features['amount_norm'] = self.scaler.transform(amounts)[:, 0]
+        features['hour'] = timestamps.dt.hour
+        features['day_of_week'] = timestamps.dt.dayofweek
+        features['category_risk'] = df['category'].map(CATEGORY_RISK).fillna(3)  # Risk score 1-5
+
+        # How unusual the amount is for its own category; unseen categories score 0
+        mean = df['category'].map(self.category_stats['mean'])
+        std = df['category'].map(self.category_stats['std']).replace(0, np.nan)
+        features['category_z'] = ((amounts['amount'] - mean) / std).fillna(0.0)
+
+        return features[FEATURE_COLUMNS]
+
     def train_model(self):
         """Train anomaly detection model"""
         try:
             if len(self.transaction_history) < 50:
                 raise ValueError("Insufficient data for training")
-                
-            features = self._extract_features()
+
+            features = self._extract_features(fit=True)
+            self.model = IsolationForest(n_estimators=100, contamination=0.05, n_jobs=-1)
             self.model.fit(features)
-            
+
         except Exception as e:
             logging.error(f"Training failed: {str(e)}")
             self.model = None  # Fallback to rules
 
-    def detect_anomalies(self) -> List[Dict]:
+    def use_registered_model(self, registry=None) -> bool:
+        """Load this user's persisted model so scoring is pure inference"""
+        from models.model_registry import get_model_registry
+
+        state = (registry or get_model_registry()).get(self.user_id, self.transaction_history)
+        if state is None:
+            self.model = None  # Rules until background training has produced a model
+            return False
+
+        self.model = state["model"]
+        self.scaler = state["scaler"]
+        self.category_stats = state["category_stats"]
+        return True
+
+    def detect_anomalies(self, transactions: Optional[List[Dict]] = None) -> List[Dict]:
         """Identify unusual patterns"""
+        transactions = transactions if transactions is not None else self.transaction_history
         if not self.model:
-            return self._rule_based_fallback()
-            
-        features = self._extract_features()
-        predictions = self.model.predict(features)
-        
-        anomalies = []
-        for i, pred in enumerate(predictions):
-            if pred == -1:  # Anomaly flag
-                anomaly = {
-                    "transaction": self.transaction_history[i],
-                    "reason": self._explain_anomaly(features.iloc[i]),
-                    "confidence": 0.85  # Example value
-                }
-                anomalies.append(anomaly)
-                
-        return anomalies
-    
-    def _explain_anomaly(self, features: pd.Series) -> str:
-        """Generate human-readable explanations"""
-        explanations = []
-        
-        if features['amount_norm'] > 3:
-            explanations.append(f"High amount (Z-score: {features['amount_norm']:.2f})")
-            
-        if features['hour'] not in [9, 10, 11, 12, 13, 14, 15, 16, 17, 18]:
-            explanations.append(f"Unusual hour: {int(features['hour'])}:00")
-            
-        if features['category_risk'] >= 4:
-            explanations.append("High-risk category")
-            
-        return ", ".join(explanations) or "Complex pattern deviation"
-
-    def _rule_based_fallback(self) -> List[Dict]:
-        """Fallback when ML model unavailable"""
-        avg = np.mean([t['amount'] for t in self.transaction_history])
+            return self._rule_based_fallback(transactions)
+
+        features = self._extract_features(transactions)
+        flagged = np.flatnonzero(self.model.predict(features) == -1)  # Anomaly flag
+        reasons = self._explain_anomalies(features.iloc[flagged])
+
         return [
-            t for t in self.transaction_history 
-            if t['amount'] > 3 * avg
-        ]
\ No newline at end of file
+            {
+                "transaction": transactions[i],
+                "reason": reason,
+                "confidence": 0.85  # Example value
+            }
+            for i, reason in zip(flagged, reasons)
+        ]
+
+    def _explain_anomalies(self, features: pd.DataFrame) -> np.ndarray:
+        """Generate human-readable explanations for every row at once"""
+        amount_norm = features['amount_norm'].to_numpy()
+        hours = features['hour'].to_numpy()
+        category_z = features['category_z'].to_numpy()
+
+        high_amount = amount_norm > 3
+        odd_hour = (hours < BUSINESS_HOURS[0]) | (hours > BUSINESS_HOURS[1])
+        weekend = features['day_of_week'].to_numpy() >= 5
+        risky_category = features['category_risk'].to_numpy() >= 4
+        category_outlier = np.abs(category_z) > 3
+
+        reasons = np.full(len(features), "", dtype=object)
+
+        def add(mask, describe):
+            # Strings are only formatted for the rows the mask selects
+            rows = np.flatnonzero(mask)
+            if rows.size:
+                texts = np.array([describe(i) for i in rows], dtype=object)
+                reasons[rows] = np.where(reasons[rows] == "", texts, reasons[rows] + ", " + texts)
+
+        add(high_amount, lambda i: f"High amount (Z-score: {amount_norm[i]:.2f})")
+        add(odd_hour, lambda i: f"Unusual hour: {int(hours[i])}:00")
+        add(weekend, lambda i: "Weekend transaction")
+        add(risky_category, lambda i: "High-risk category")
+        add(category_outlier, lambda i: f"Unusual for category (Z-score: {category_z[i]:.2f})")
+
+        reasons[reasons == ""] = "Complex pattern deviation"
+        return reasons
+
+    def _rule_based_fallback(self, transactions: Optional[List[Dict]] = None) -> List[Dict]:
+        """Fallback when ML model unavailable"""
+        transactions = transactions if transactions is not None else self.transaction_history
+        amounts = np.fromiter((t['amount'] for t in transactions), dtype=float, count=len(transactions))
+        return [transactions[i] for i in np.flatnonzero(amounts > 3 * amounts.mean())]
@@ -0,0 +1,195 @@
+# models/model_registry.py
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import joblib
+
+# 2: states carry per-row digests so edits, not just growth, trigger retraining
+MODEL_VERSION = 2
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _row_digest(transaction):
+    return hashlib.sha256(json.dumps(transaction, sort_keys=True, default=str).encode("utf-8")).digest()[:8]
+
+
+def row_digests(transactions):
+    """Sorted short hashes of the rows, so histories can be diffed regardless of order"""
+    return sorted(_row_digest(t) for t in transactions)
+
+
+def history_key(transactions):
+    """Cheap O(1) stand-in for the fingerprint: row count and last row"""
+    return len(transactions), _row_digest(transactions[-1]) if transactions else b""
+
+
+def history_fingerprint(digests):
+    """Stable hash of a whole history, from its row_digests"""
+    return hashlib.sha256(b"".join(digests)).hexdigest()
+
+
+class ModelRegistry:
+    """Per-user fitted BehaviorAnalyzer state on disk, cached in a bounded LRU.
+
+    Lookups never train or diff histories: a missing model is trained, and a
+    history whose cheap key (row count, last row) moved is diffed against the
+    model's training rows, on a background worker while callers keep using
+    what is already there. Unchanged keys are re-diffed every
+    MODEL_RECHECK_SECONDS so edits to older rows are caught too.
+    """
+
+    def __init__(self, path=None, max_models=None, retrain_ratio=None):
+        self.path = path or os.getenv("MODEL_REGISTRY_PATH", os.path.join(_BACKEND_DIR, 'cache', 'models'))
+        self.max_models = int(max_models or os.getenv("MODEL_REGISTRY_MAX_MODELS", 256))
+        # Fraction of new/removed rows that counts as a material history change
+        self.retrain_ratio = float(retrain_ratio or os.getenv("MODEL_RETRAIN_RATIO", 0.1))
+        self.recheck_seconds = float(os.getenv("MODEL_RECHECK_SECONDS", 3600))
+        os.makedirs(self.path, exist_ok=True)
+
+        self._models = OrderedDict()
+        # user_id -> (history_key, time) of the last full diff against the model
+        self._checked = OrderedDict()
+        self._training = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("MODEL_TRAINING_WORKERS", 1)), thread_name_prefix="model-training"
+        )
+
+    def get(self, user_id, transactions=None):
+        """Fitted state for a user, or None if nothing usable is trained yet.
+
+        Passing the user's current history schedules a background check, and
+        a retrain if it has changed materially since the model was fitted.
+        """
+        state = self._load(user_id)
+        if transactions is not None and self._should_check(user_id, state, transactions):
+            self._schedule(self._check, user_id, transactions)
+        return state if state and state.get("model") is not None else None
+
+    def schedule_training(self, user_id, transactions):
+        self._schedule(self._train, user_id, transactions)
+
+    def _schedule(self, task, user_id, transactions):
+        with self._lock:
+            if user_id in self._training:
+                return
+            self._training.add(user_id)
+        self._executor.submit(task, user_id, list(transactions))
+
+    def _should_check(self, user_id, state, transactions):
+        if state is None or state["version"] != MODEL_VERSION:
+            return True
+        with self._lock:
+            checked = self._checked.get(user_id)
+        if checked is None:
+            return True
+        key, checked_at = checked
+        return key != history_key(transactions) or time.time() - checked_at > self.recheck_seconds
+
+    def _check(self, user_id, transactions):
+        try:
+            if self._needs_training(self._load(user_id), transactions):
+                self._train(user_id, transactions)
+                return
+            self._mark_checked(user_id, transactions)
+        except Exception as e:
+            logging.error(f"Model check failed for {user_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._training.discard(user_id)
+
+    def _mark_checked(self, user_id, transactions):
+        with self._lock:
+            self._checked[user_id] = (history_key(transactions), time.time())
+            self._checked.move_to_end(user_id)
+            while len(self._checked) > self.max_models:
+                self._checked.popitem(last=False)
+
+    def _needs_training(self, state, transactions):
+        if state is None or state["version"] != MODEL_VERSION:
+            return True
+        digests = row_digests(transactions)
+        if history_fingerprint(digests) == state["fingerprint"]:
+            return False
+        # Rows added, removed or edited since training (an edit is one removed plus one added)
+        current, trained = Counter(digests), Counter(state["row_digests"])
+        changed = max(sum((current - trained).values()), sum((trained - current).values()))
+        return changed >= max(1, self.retrain_ratio * state["rows"])
+
+    def _train(self, user_id, transactions):
+        # Imported here so the registry itself stays cheap to import
+        from models.behavior_analysis import BehaviorAnalyzer
+
+        try:
+            analyzer = BehaviorAnalyzer(user_id)
+            analyzer.transaction_history = transactions
+            analyzer.train_model()
+
+            # Too little data still gets recorded so it isn't retried every request
+            digests = row_digests(transactions)
+            state = {
+                "version": MODEL_VERSION,
+                "user_id": user_id,
+                "fingerprint": history_fingerprint(digests),
+                "row_digests": digests,
+                "rows": len(transactions),
+                "trained_at": time.time(),
+                "model": analyzer.model,
+                "scaler": analyzer.scaler if analyzer.model else None,
+                "category_stats": analyzer.category_stats if analyzer.model else None
+            }
+            joblib.dump(state, self._file(user_id))
+            self._remember(user_id, state)
+            self._mark_checked(user_id, transactions)
+        except Exception as e:
+            logging.error(f"Model training failed for {user_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._training.discard(user_id)
+
+    def _load(self, user_id):
+        with self._lock:
+            if user_id in self._models:
+                self._models.move_to_end(user_id)
+                return self._models[user_id]
+
+        try:
+            state = joblib.load(self._file(user_id))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"Could not load model for {user_id}: {str(e)}")
+            return None
+        self._remember(user_id, state)
+        return state
+
+    def _remember(self, user_id, state):
+        with self._lock:
+            self._models[user_id] = state
+            self._models.move_to_end(user_id)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+
+    def _file(self, user_id):
+        # Hash the id so arbitrary user ids are safe file names
+        name = hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{name}.joblib")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from langchain_groq import ChatGroq
 from langchain.prompts import PromptTemplate
 from dotenv import load_dotenv
-import os
+import threading
+
+from services.llm import create_llm
 
 # Load environment variables
 load_dotenv()
@@ -24,15 +25,16 @@ prompt = PromptTemplate(
     input_variables=["question"]
 )
 
-# Initialize the Groq model
-model = ChatGroq(
-    temperature=0.3,
-    model_name="llama2-70b-4096",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+_chain = None
+_chain_lock = threading.Lock()
 
-# Create the chain using the new syntax
-chain = prompt | model
+def get_chain():
+    # The Groq client is built on the first question, not at import
+    global _chain
+    with _chain_lock:
+        if _chain is None:
+            _chain = prompt | create_llm("suggestion", model_name="llama2-70b-4096", temperature=0.3)
+        return _chain
 
 class QuestionRequest(BaseModel):
     question: str
@@ -40,7 +42,7 @@ class QuestionRequest(BaseModel):
 def ask_suggestion(request: QuestionRequest):
     try:
         # Get response from the chain
-        response = chain.invoke({"question": request.question})
+        response = get_chain().invoke({"question": request.question})
         
         # Clean up the response
         cleaned_response = response.content.strip().replace("</s>", "")
@@ -1,35 +1,95 @@
-from flask import Blueprint, request, jsonify, session
-from services.chat_service import ChatService
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
+import asyncio
+import json
+import logging
+from services.async_runtime import iter_sync, read_json, request_timeout
+from services.chat_sessions import get_chat_session_store
+from services.startup import lazy_import
+
+# langchain and the LLM client load with the first message
+chat_service = lazy_import("services.chat_service")
 
 chat_bp = Blueprint('chat', __name__)
 
+
+def _session_id(data=None):
+    # Only the session id lives in the cookie; the history stays server-side
+    session_id = (data or {}).get('session_id') or session.get('chat_session_id')
+    if not session_id:
+        session_id = get_chat_session_store().create().session_id
+    session['chat_session_id'] = session_id
+    return session_id
+
+
 @chat_bp.route('/message', methods=['POST'])
-def handle_message():
+async def handle_message():
     try:
-        user_message = request.json.get('message')
+        data = await read_json() or {}
+        user_message = data.get('message')
         if not user_message:
             return jsonify({"error": "No message provided"}), 400
-        
-        # Get conversation history from session
-        history = session.get('chat_history', [])
-        
-        # Process through service
-        service = ChatService()
-        response, updated_history = service.process_message(user_message, history)
-        
-        # Update session with new history
-        session['chat_history'] = updated_history
-        
+
+        session_id = _session_id(data)
+        # First use imports langchain and builds the client; keep that off the loop
+        service = await asyncio.to_thread(lambda: chat_service.get_chat_service())
+        response = await service.aprocess_message(session_id, user_message)
+
         return jsonify({
             "success": True,
             "response": response,
-            "history": updated_history
+            "session_id": session_id
         })
-        
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@chat_bp.route('/message/stream', methods=['POST'])
+def stream_message():
+    data = request.json or {}
+    user_message = data.get('message')
+    if not user_message:
+        return jsonify({"error": "No message provided"}), 400
+
+    session_id = _session_id(data)
+    use_sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    timeout = request_timeout()
+
+    def events():
+        try:
+            # Tokens come from astream on the shared loop; a disconnect cancels it
+            tokens = chat_service.get_chat_service().astream_message(session_id, user_message)
+            for token in iter_sync(tokens, timeout):
+                yield {"event": "token", "token": token}
+            yield {"event": "done", "session_id": session_id}
+        except Exception as e:
+            logging.error(f"Chat stream failed: {str(e)}")
+            yield {"event": "error", "error": str(e)}
+
+    def generate():
+        for event in events():
+            if use_sse:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@chat_bp.route('/history', methods=['GET'])
+def get_history():
+    try:
+        session_id = _session_id(request.args)
+        return jsonify({"success": True, "session_id": session_id, **chat_service.get_chat_service().history(session_id)})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @chat_bp.route('/new-session', methods=['POST'])
 def new_session():
-    session.pop('chat_history', None)
-    return jsonify({"success": True, "message": "New session started"})
\ No newline at end of file
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id') or session.pop('chat_session_id', None)
+    if session_id:
+        get_chat_session_store().delete(session_id)
+    return jsonify({"success": True, "message": "New session started"})
@@ -1,22 +1,33 @@
 # routes/fraud_routes.py
-from flask import Blueprint, request, jsonify
-from services.fraud_detector import AdvancedFraudDetector
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from services.async_runtime import read_json
+from services.startup import lazy_import
+import asyncio
+import json
+import os
+
+# pandas and sklearn load with the first fraud request
+fraud_detector = lazy_import("services.fraud_detector")
+batch_fraud_scorer = lazy_import("services.batch_fraud_scorer")
 
 fraud_bp = Blueprint('fraud', __name__)
 
 @fraud_bp.route('/analyze', methods=['POST'])
-def analyze_transaction():
+async def analyze_transaction():
     try:
-        data = request.json
-        detector = AdvancedFraudDetector(data['user_id'])
-        
+        data = await read_json()
+
         # Validate input format
         if not data.get('transaction'):
             return jsonify({"error": "Missing transaction data", "success": False}), 400
-            
+
+        # Importing pandas/sklearn, loading the history and scoring are all
+        # blocking, so they run in worker threads and the loop stays free
+        detector = await asyncio.to_thread(lambda: fraud_detector.AdvancedFraudDetector(data['user_id']))
+
         # Get results - don't call .dict() on the results
-        real_time_result = detector.analyze_transaction(data['transaction'])
-        behavior_result = detector.detect_behavior_anomalies()
+        real_time_result = await asyncio.to_thread(detector.analyze_transaction, data['transaction'])
+        behavior_result = await detector.adetect_behavior_anomalies()
         
         return jsonify({
             "success": True,
@@ -28,4 +39,57 @@ def analyze_transaction():
         return jsonify({
             "error": f"Processing error: {str(e)}",
             "success": False
-        }), 500
\ No newline at end of file
+        }), 500
+
+def _iter_ndjson(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def _iter_chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@fraud_bp.route('/analyze-batch', methods=['POST'])
+def analyze_batch():
+    """Score many users' transactions; results stream back as NDJSON.
+
+    Accepts a JSON array (or {"transactions": [...]}), an NDJSON body, or an
+    NDJSON file upload under 'file'. Every row needs a user_id.
+    """
+    try:
+        if 'file' in request.files:
+            rows = _iter_ndjson(request.files['file'].stream)
+        elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            rows = _iter_ndjson(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            rows = data.get('transactions') if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                return jsonify({"error": "Expected a list of transactions", "success": False}), 400
+    except Exception as e:
+        return jsonify({"error": f"Invalid input: {str(e)}", "success": False}), 400
+
+    chunk_size = int(os.getenv("FRAUD_BATCH_CHUNK_SIZE", 10000))
+
+    def generate():
+        offset = 0
+        try:
+            # Each chunk is scored in one vectorized pass and flushed before the next is read
+            for chunk in _iter_chunks(rows, chunk_size):
+                for result in batch_fraud_scorer.score_batch(chunk):
+                    result["index"] += offset
+                    yield json.dumps(result) + "\n"
+                offset += len(chunk)
+            yield json.dumps({"done": True, "scored": offset}) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Processing error: {str(e)}", "success": False, "scored": offset}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -1,20 +1,36 @@
 from flask import Blueprint, request, jsonify
-from services.investment_advisor import InvestmentAdvisor
+import asyncio
+from services.async_runtime import read_json
+from services.startup import lazy_import
+
+# numpy and the LLM client load with the first recommendation
+investment_advisor = lazy_import("services.investment_advisor")
+scheme_catalogue = lazy_import("services.scheme_catalogue")
 
 investment_bp = Blueprint('investment', __name__)
 
 @investment_bp.route('/get-recommendations', methods=['POST'])
-def get_recommendations():
+async def get_recommendations():
     try:
-        user_data = request.json
+        user_data = await read_json()
         if not user_data:
             return jsonify({
                 "success": False,
                 "error": "No input data provided"
             }), 400
 
-        advisor = InvestmentAdvisor()
-        result = advisor.get_recommendations(user_data)
+        if not isinstance(user_data, dict):
+            return jsonify({
+                "success": False,
+                "error": "Invalid profile: profile must be a JSON object",
+                "fields": {"profile": "must be a JSON object"}
+            }), 400
+
+        # ?mode=scores returns the local ranking without calling the LLM
+        scores_only = request.args.get('mode') == 'scores' or bool(user_data.pop('scores_only', False))
+        # First use imports numpy/langchain and loads the catalogue; keep that off the loop
+        advisor = await asyncio.to_thread(lambda: investment_advisor.get_investment_advisor())
+        result = await advisor.aget_recommendations(user_data, scores_only=scores_only)
 
         if "error" in result:
             return jsonify({
@@ -27,6 +43,12 @@ def get_recommendations():
             "recommendations": result.get("recommendations", [])
         })
 
+    except scheme_catalogue.ProfileError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "fields": e.fields
+        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
@@ -0,0 +1,106 @@
+# routes/statement_routes.py
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import asyncio
+import json
+import threading
+
+from services.async_runtime import read_files
+from services.job_queue import JobQueue, QueueFullError
+from services.startup import lazy_import
+
+# PyPDF2, langchain and the categorizer load with the first statement
+pipeline = lazy_import("services.statement_pipeline")
+
+statement_bp = Blueprint('statement', __name__)
+
+def run_statement_job(pdf_bytes, progress):
+    return pipeline.run_statement_job(pdf_bytes, progress)
+
+_jobs = None
+_jobs_lock = threading.Lock()
+
+def get_statement_jobs():
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = JobQueue(run_statement_job, name="process_statement")
+        return _jobs
+
+@statement_bp.route('', methods=['POST'])
+async def process_statement():
+    files = await read_files()
+    if 'file' not in files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = files['file']
+    if file.filename == '':
+        return jsonify({"error": "Empty file name"}), 400
+
+    try:
+        pdf_bytes = await asyncio.to_thread(file.read)
+        # First use imports PyPDF2 and langchain; keep that off the loop
+        aprocess_pdf = await asyncio.to_thread(lambda: pipeline.aprocess_pdf)
+        result = await aprocess_pdf(pdf_bytes)
+        return jsonify(pipeline.statement_response(result))
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@statement_bp.route('/stream', methods=['POST'])
+def stream_statement():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "Empty file name"}), 400
+
+    # Read the upload now; the request stream is gone once the response starts
+    pdf_bytes = file.read()
+    use_sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+
+    def generate():
+        for event in pipeline.iter_statement_events(pdf_bytes):
+            if use_sse:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@statement_bp.route('/jobs', methods=['POST'])
+def submit_statement_job():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "Empty file name"}), 400
+
+    try:
+        job_id = get_statement_jobs().submit(file.read())
+    except QueueFullError as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": f"/api/process-statement/jobs/{job_id}"
+    }), 202
+
+@statement_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_statement_job(job_id):
+    job = get_statement_jobs().get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify({"success": True, **job})
+
+@statement_bp.route('/queue', methods=['GET'])
+def statement_queue_stats():
+    return jsonify({"success": True, **get_statement_jobs().stats()})
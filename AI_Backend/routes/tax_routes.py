@@ -1,40 +1,62 @@
 # routes/tax_routes.py
-from flask import Blueprint, request, jsonify, send_file
-from services.tax_processor import TaxProcessor
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from services.startup import lazy_import
 from io import BytesIO
-from reportlab.pdfgen import canvas
+
+# numpy, pandas, reportlab and the LLM client load with the first tax request
+tax_processor = lazy_import("services.tax_processor")
+tax_engine = lazy_import("services.tax_engine")
+itr_generator = lazy_import("services.itr_generator")
 
 tax_bp = Blueprint('tax', __name__)
 
 @tax_bp.route('/calculate-tax', methods=['POST'])
 def calculate_tax():
     financial_data = request.json
-    tax_processor = TaxProcessor()
-    tax_liability = tax_processor.calculate_tax(financial_data)
+    tax_liability = tax_processor.get_tax_processor().calculate_tax(
+        financial_data, fy=financial_data.get('fy') or tax_engine.DEFAULT_FY
+    )
     return jsonify(tax_liability)
 
+@tax_bp.route('/simulate', methods=['POST'])
+def simulate_tax():
+    """What-if liabilities for many scenarios under every regime of their FY"""
+    try:
+        data = request.json
+        scenarios = data.get('scenarios') if isinstance(data, dict) else data
+        if not isinstance(scenarios, list) or not scenarios:
+            return jsonify({"success": False, "error": "Expected a list of scenarios"}), 400
+
+        results = tax_engine.get_tax_engine().simulate(scenarios)
+        return jsonify({"success": True, "count": len(results), "results": results})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @tax_bp.route('/generate-itr', methods=['POST'])
 def generate_itr():
     tax_data = request.json
-    tax_processor = TaxProcessor()
-    
     # Get filled form structure
-    itr_form = tax_processor.generate_itr_form(tax_data)
-    
-    # Generate PDF
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
+    itr_form = tax_processor.get_tax_processor().generate_itr_form(tax_data, tax_data.get('personal_info'))
     
-    # Add form data to PDF
-    p.drawString(100, 800, f"Taxable Income: {itr_form['income_details']['taxable_income']}")
-    p.drawString(100, 780, f"Tax Payable: {itr_form['tax_payable']}")
-    
-    p.save()
-    
-    buffer.seek(0)
+    # Generate PDF from the cached page template
+    buffer = BytesIO(itr_generator.render_itr_pdf(itr_form))
     return send_file(
         buffer,
         as_attachment=True,
         download_name="ITR_FORM.pdf",
         mimetype='application/pdf'
-    )
\ No newline at end of file
+    )
+
+@tax_bp.route('/generate-itr/bulk', methods=['POST'])
+def generate_itr_bulk():
+    """ZIP of ITR-1 PDFs for many calculate_tax results, streamed as rendered"""
+    data = request.json
+    items = data.get('forms') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "error": "Expected a list of forms"}), 400
+
+    return Response(
+        stream_with_context(itr_generator.iter_itr_zip(items)),
+        mimetype='application/zip',
+        headers={"Content-Disposition": "attachment; filename=ITR_FORMS.zip"}
+    )
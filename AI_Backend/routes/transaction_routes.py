@@ -0,0 +1,39 @@
+# routes/transaction_routes.py
+from flask import Blueprint, request, jsonify
+from services.startup import lazy_import
+
+# numpy and the columnar store load with the first query
+transaction_store = lazy_import("services.transaction_store")
+
+transaction_bp = Blueprint('transactions', __name__)
+
+@transaction_bp.route('/summary', methods=['GET'])
+def transaction_summary():
+    try:
+        store = transaction_store.get_transaction_store()
+        group_by = request.args.get('by', 'category')
+        if group_by not in transaction_store.DICTIONARY_COLUMNS:
+            return jsonify({
+                "success": False,
+                "error": f"Cannot group by {group_by}"
+            }), 400
+        
+        # Repeated query params select several values: ?category=Food&category=Transportation
+        filters = {
+            "start": request.args.get('start'),
+            "end": request.args.get('end'),
+            **{column: request.args.getlist(column) or None for column in transaction_store.DICTIONARY_COLUMNS}
+        }
+        
+        return jsonify({
+            "success": True,
+            "count": store.count(**filters),
+            "total": store.total(**filters),
+            "groups": store.sum_by(group_by, **filters)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"Query error: {str(e)}"
+        }), 500
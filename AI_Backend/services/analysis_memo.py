@@ -0,0 +1,98 @@
+# services/analysis_memo.py
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+
+def row_hash(transaction):
+    return hashlib.sha256(json.dumps(transaction, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def rolling_hash(transactions, start_hash=""):
+    """Prefix hash h_n = H(h_(n-1) + row_hash(row_n)): hash(history + delta)
+    can be resumed from hash(history) without touching the older rows again."""
+    current = start_hash
+    for transaction in transactions:
+        current = hashlib.sha256((current + row_hash(transaction)).encode("utf-8")).hexdigest()
+    return current
+
+
+class AnalysisMemo:
+    """Last LLM analysis per user, keyed on the rolling hash of the history it covered.
+
+    A history reuses the analysis only if its first `count` rows hash to the
+    memoized prefix hash. The row count and last row are compared first, so
+    a changed history is usually rejected without hashing the whole prefix.
+    """
+
+    def __init__(self, max_entries=None):
+        self.max_entries = int(max_entries or os.getenv("ANALYSIS_MEMO_MAX_ENTRIES", 10000))
+        self.hits = 0
+        self.incremental = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id, history):
+        """Classify a request against the memo.
+
+        Returns (result, delta, full_hash): result is set when the history is
+        unchanged; otherwise delta holds the rows added since the memoized
+        analysis (the whole history if it can't be extended).
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry:
+                self._entries.move_to_end(user_id)
+
+        if entry and self._extends(entry, history):
+            delta = history[entry["count"]:]
+            # Resume the chain from the stored prefix hash; only the new rows are hashed
+            full_hash = rolling_hash(delta, entry["hash"])
+            if not delta:
+                self.hits += 1
+                return entry["result"], [], full_hash
+            self.incremental += 1
+            return entry["result"], delta, full_hash
+
+        self.misses += 1
+        return None, history, rolling_hash(history)
+
+    @staticmethod
+    def _extends(entry, history):
+        count = entry["count"]
+        if count > len(history):
+            return False
+        # Cheap rejection first; an edited or removed older row is caught by the prefix hash
+        if count and row_hash(history[count - 1]) != entry["last_row"]:
+            return False
+        return rolling_hash(history[:count]) == entry["hash"]
+
+    def store(self, user_id, history, full_hash, result):
+        with self._lock:
+            self._entries[user_id] = {
+                "count": len(history),
+                "hash": full_hash,
+                "last_row": row_hash(history[-1]) if history else "",
+                "result": result
+            }
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "incremental": self.incremental,
+            "misses": self.misses,
+            "entries": len(self._entries)
+        }
+
+
+_memo = AnalysisMemo()
+
+
+def get_analysis_memo():
+    return _memo
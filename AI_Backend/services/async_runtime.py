@@ -0,0 +1,173 @@
+# services/async_runtime.py
+from contextlib import asynccontextmanager
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from services.metrics import registry, Gauge
+
+tasks_in_flight = registry.register(Gauge(
+    "coinwise_async_tasks_in_flight", "Coroutines running on the shared event loop"
+))
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """The process-wide loop every async view and LLM call runs on.
+
+    One long-lived loop lets the async Groq clients keep a single pooled
+    connection set; a fresh loop per request would strand it.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-runtime", daemon=True).start()
+        return _loop
+
+
+def request_timeout():
+    """Seconds an async view may run before its task is cancelled; clients can
+    ask for less (or more, up to the max) with an X-Request-Timeout header"""
+    # Read per request, so values from .env (loaded after this module) apply
+    default = float(os.getenv("LLM_REQUEST_TIMEOUT", 60))
+    try:
+        timeout = float(request.headers.get("X-Request-Timeout", default))
+    except ValueError:
+        timeout = default
+    return min(max(timeout, 0.1), float(os.getenv("LLM_REQUEST_TIMEOUT_MAX", 300)))
+
+
+async def _tracked(coro):
+    tasks_in_flight.inc()
+    try:
+        return await coro
+    finally:
+        tasks_in_flight.dec()
+
+
+def run_sync(coro, timeout=None):
+    """Run coro on the shared loop and wait for it from this thread.
+
+    The coroutine sees the caller's context variables, so Flask's request
+    and g work inside it. On timeout the task is cancelled, which aborts
+    the in-flight upstream request, and RequestTimeout is raised.
+    """
+    future = asyncio.run_coroutine_threadsafe(_tracked(coro), get_event_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        if future.done():
+            # The coroutine itself raised TimeoutError
+            raise
+        future.cancel()
+        raise RequestTimeout(f"Request timed out after {timeout:g}s")
+    except BaseException:
+        # Includes the worker being interrupted while waiting
+        future.cancel()
+        raise
+
+
+def iter_sync(agen, timeout=None):
+    """Drive an async generator from a sync one, e.g. a streaming response.
+
+    timeout bounds the whole stream. Closing this generator (the client
+    went away) closes agen on the loop, which cancels the upstream stream.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+            try:
+                item = run_sync(agen.__anext__(), remaining)
+            except StopAsyncIteration:
+                return
+            except RequestTimeout:
+                # Report the stream's budget, not what was left of it
+                raise RequestTimeout(f"Request timed out after {timeout:g}s") from None
+            yield item
+    finally:
+        try:
+            run_sync(_aclose(agen), 5)
+        except Exception as e:
+            logging.error(f"Closing async stream failed: {str(e)}")
+
+
+async def _aclose(agen):
+    # A cancelled __anext__ may still be unwinding inside the generator
+    while agen.ag_running:
+        await asyncio.sleep(0)
+    await agen.aclose()
+
+
+async def read_json():
+    """request.json without blocking the loop on a slow upload"""
+    return await asyncio.to_thread(lambda: request.json)
+
+
+async def read_files():
+    """request.files, parsed off the loop"""
+    return await asyncio.to_thread(lambda: request.files)
+
+
+@asynccontextmanager
+async def hold(lock):
+    """Hold a threading lock from a coroutine without blocking the loop.
+
+    An uncontended lock is taken directly; otherwise a worker thread waits
+    for it. Coroutines sharing a lock should queue on an asyncio.Lock first
+    so at most one thread waits per lock.
+    """
+    if not lock.acquire(blocking=False):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread may still get the lock after we've gone; hand it straight back
+            acquiring.add_done_callback(lambda done: _release_if_acquired(lock, done))
+            raise
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _release_if_acquired(lock, done):
+    if not done.cancelled() and done.exception() is None and done.result():
+        lock.release()
+
+
+class AsyncFlask(Flask):
+    """Flask that runs `async def` views on the shared event loop.
+
+    The worker thread only waits on a future while the upstream call is
+    multiplexed on the loop, so a threaded server with a high thread count
+    can hold hundreds of in-flight LLM requests. Views that time out get
+    a 504 and their task is cancelled.
+    """
+
+    def ensure_sync(self, func):
+        if not inspect.iscoroutinefunction(func):
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return run_sync(func(*args, **kwargs), request_timeout())
+            except RequestTimeout as e:
+                return jsonify({"success": False, "error": str(e)}), 504
+
+        return wrapper
@@ -0,0 +1,101 @@
+# services/behavior_digest.py
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.behavior_analysis import BehaviorAnalyzer
+
+TOP_CATEGORIES = int(os.getenv("DIGEST_TOP_CATEGORIES", 10))
+TOP_MERCHANTS = int(os.getenv("DIGEST_TOP_MERCHANTS", 10))
+MAX_OUTLIERS = int(os.getenv("DIGEST_MAX_OUTLIERS", 10))
+
+
+def _round(value):
+    return round(float(value), 2) if pd.notna(value) else None
+
+
+def _distribution(amounts):
+    return {
+        "count": int(amounts.count()),
+        "total": _round(amounts.sum()),
+        "mean": _round(amounts.mean()),
+        "std": _round(amounts.std()),
+        "p50": _round(amounts.quantile(0.5)),
+        "p90": _round(amounts.quantile(0.9)),
+        "max": _round(amounts.max())
+    }
+
+
+def build_digest(user_id, transactions):
+    """Condense a transaction history into fixed-size statistics.
+
+    The digest's size depends only on the TOP_*/MAX_OUTLIERS limits, not on
+    how many transactions the user has, so prompts built from it stay flat.
+    """
+    if not transactions:
+        return {"transaction_count": 0}
+
+    df = pd.DataFrame(transactions)
+    df["amount"] = pd.to_numeric(df.get("amount"), errors="coerce").fillna(0.0)
+    category = df["category"].fillna("Unknown") if "category" in df else pd.Series("Unknown", index=df.index)
+    merchant = df["merchant"].fillna("Unknown") if "merchant" in df else pd.Series("Unknown", index=df.index)
+    timestamps = pd.to_datetime(df["timestamp"] if "timestamp" in df else pd.Series(None, index=df.index),
+                                errors="coerce", format="ISO8601")
+
+    by_category = df["amount"].groupby(category)
+    top_categories = set(by_category.sum().nlargest(TOP_CATEGORIES).index)
+    by_merchant = df["amount"].groupby(merchant).agg(["count", "sum"]).nlargest(TOP_MERCHANTS, "sum")
+
+    digest = {
+        "transaction_count": len(df),
+        "period": {
+            "first": timestamps.min().isoformat() if timestamps.notna().any() else None,
+            "last": timestamps.max().isoformat() if timestamps.notna().any() else None
+        },
+        "amounts": _distribution(df["amount"]),
+        "categories": {name: _distribution(amounts) for name, amounts in by_category if name in top_categories},
+        "other_categories": max(0, category.nunique() - len(top_categories)),
+        "top_merchants": [
+            {"merchant": name, "count": int(row["count"]), "total": _round(row["sum"])}
+            for name, row in by_merchant.iterrows()
+        ],
+        "merchant_count": int(merchant.nunique())
+    }
+
+    if timestamps.notna().any():
+        # 7x24 weekday/hour heatmap of transaction counts (Monday first)
+        valid = timestamps.dropna()
+        heatmap = np.zeros((7, 24), dtype=int)
+        np.add.at(heatmap, (valid.dt.dayofweek.to_numpy(), valid.dt.hour.to_numpy()), 1)
+        digest["weekday_hour_heatmap"] = heatmap.tolist()
+
+    digest["recent_outliers"] = _recent_outliers(user_id, transactions)
+    return digest
+
+
+def _recent_outliers(user_id, transactions):
+    """Anomalies flagged locally by BehaviorAnalyzer, most recent first"""
+    try:
+        analyzer = BehaviorAnalyzer(user_id)
+        analyzer.transaction_history = transactions
+        analyzer.use_registered_model()
+        anomalies = analyzer.detect_anomalies()
+    except Exception as e:
+        logging.error(f"Local outlier detection failed: {str(e)}")
+        return []
+
+    outliers = []
+    for anomaly in anomalies:
+        # The rule-based fallback returns bare transactions
+        transaction = anomaly.get("transaction", anomaly)
+        outliers.append({
+            "amount": transaction.get("amount"),
+            "category": transaction.get("category"),
+            "merchant": transaction.get("merchant"),
+            "timestamp": transaction.get("timestamp"),
+            "reason": anomaly.get("reason", "Amount over 3x average")
+        })
+    outliers.sort(key=lambda outlier: str(outlier["timestamp"] or ""), reverse=True)
+    return outliers[:MAX_OUTLIERS]
@@ -0,0 +1,183 @@
+# services/behavior_profile.py
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import json
+import math
+import os
+import threading
+
+# Minimum observations before a statistic is trusted for scoring
+MIN_SAMPLES = 5
+MIN_HOUR_SAMPLES = 20
+RARE_HOUR_SHARE = 0.02
+ANOMALY_THRESHOLD = 50
+# Recent transaction keys remembered per profile so a retried transaction is counted once
+SEEN_TRANSACTIONS = int(os.getenv("PROFILE_SEEN_TRANSACTIONS", 1000))
+
+
+class RunningStats:
+    """Welford's online mean/variance"""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def zscore(self, value):
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+
+def transaction_hour(transaction):
+    timestamp = transaction.get("timestamp")
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(str(timestamp)).hour
+    except ValueError:
+        return None
+
+
+def transaction_key(transaction):
+    """The transaction's id, or a hash of what it contains when it has none"""
+    key = transaction.get("transaction_id") or transaction.get("id")
+    if key is not None:
+        return str(key)
+    fields = {name: transaction.get(name) for name in ("timestamp", "amount", "merchant", "category")}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class BehaviorProfile:
+    """Incrementally maintained spending profile; every update is O(1)"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.amounts = RunningStats()
+        self.categories = {}
+        self.merchants = {}  # doubles as the seen-merchant set
+        self.hours = [0] * 24
+        self._seen = OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, transaction):
+        """Fold a transaction into the baseline; False if it was already counted"""
+        key = transaction_key(transaction)
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        if len(self._seen) > SEEN_TRANSACTIONS:
+            self._seen.popitem(last=False)
+
+        amount = float(transaction.get("amount", 0) or 0)
+        self.amounts.update(amount)
+        self.categories.setdefault(transaction.get("category", ""), RunningStats()).update(amount)
+        self.merchants.setdefault(transaction.get("merchant", ""), RunningStats()).update(amount)
+        hour = transaction_hour(transaction)
+        if hour is not None:
+            self.hours[hour] += 1
+        return True
+
+    def score(self, transaction):
+        """Risk score 0-100 with the signals that produced it"""
+        amount = float(transaction.get("amount", 0) or 0)
+        category = transaction.get("category", "")
+        merchant = transaction.get("merchant", "")
+        signals = []
+
+        category_stats = self.categories.get(category)
+        if category_stats and category_stats.count >= MIN_SAMPLES:
+            z = category_stats.zscore(amount)
+            if z > 2:
+                signals.append((min(35, (z - 2) * 12), f"Amount is {z:.1f} std devs above usual {category} spend"))
+        elif self.amounts.count >= MIN_SAMPLES:
+            signals.append((10, f"First transactions in category {category or 'unknown'}"))
+
+        if self.amounts.count >= MIN_SAMPLES:
+            z = self.amounts.zscore(amount)
+            if z > 3:
+                signals.append((min(20, (z - 3) * 8), f"Amount is {z:.1f} std devs above overall spend"))
+            if merchant and merchant not in self.merchants:
+                signals.append((20, f"New merchant: {merchant}"))
+
+        hour = transaction_hour(transaction)
+        hour_total = sum(self.hours)
+        if hour is not None and hour_total >= MIN_HOUR_SAMPLES:
+            share = self.hours[hour] / hour_total
+            if share < RARE_HOUR_SHARE:
+                signals.append((15, f"Unusual hour {hour}:00 ({share:.1%} of past activity)"))
+
+        signals.sort(key=lambda signal: signal[0], reverse=True)
+        risk_score = int(min(100, round(sum(weight for weight, _ in signals))))
+        return {
+            "success": True,
+            "is_anomalous": risk_score >= ANOMALY_THRESHOLD,
+            "risk_score": risk_score,
+            "primary_reason": signals[0][1] if signals else "Consistent with past behavior",
+            "supporting_evidence": "; ".join(reason for _, reason in signals[1:]),
+            # Confidence grows with how much history the profile has seen
+            "confidence": round(min(1.0, self.amounts.count / 50), 2)
+        }
+
+    def summary(self):
+        count = self.amounts.count
+        return {
+            "user_id": self.user_id,
+            "transaction_count": count,
+            "average_amount": self.amounts.mean,
+            "amount_std": self.amounts.std,
+            "merchant_diversity": len(self.merchants),
+            "category_diversity": len(self.categories),
+            "profile_status": "active" if count > 0 else "new_user"
+        }
+
+
+class ProfileStore:
+    """Per-user profiles in a bounded in-memory LRU; history is replayed only
+    on first use, or again after the profile has been evicted"""
+
+    def __init__(self, max_profiles=None):
+        self.max_profiles = int(max_profiles or os.getenv("PROFILE_STORE_MAX_PROFILES", 10000))
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, history=None, loader=None):
+        """The user's profile, built from history (or loader(), called only
+        on a miss) the first time the user is seen"""
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None:
+                self._profiles.move_to_end(user_id)
+                return profile
+
+        # Load outside the lock so one slow history query doesn't stall every user
+        if history is None and loader is not None:
+            history = loader()
+        profile = BehaviorProfile(user_id)
+        for transaction in history or []:
+            profile.update(transaction)
+        with self._lock:
+            # Another request may have built it meanwhile; keep the first
+            profile = self._profiles.setdefault(user_id, profile)
+            self._profiles.move_to_end(user_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            return profile
+
+
+_store = ProfileStore()
+
+
+def get_profile_store():
+    return _store
@@ -0,0 +1,141 @@
+# services/categorization_cache.py
+from collections import OrderedDict
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+_DATE_RE = re.compile(
+    r'\b\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}\b'
+    r'|\b\d{1,2}[\s-]?(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[\s,-]*\d{2,4}\b',
+    re.IGNORECASE
+)
+_AMOUNT_RE = re.compile(r'(?:rs\.?|inr|₹)\s*\d[\d,]*(?:\.\d+)?|\b\d[\d,]*\.\d+\b', re.IGNORECASE)
+# Any token still containing a digit is a reference/UTR/cheque number
+_REFERENCE_RE = re.compile(r'\b\w*\d\w*\b')
+_SEPARATOR_RE = re.compile(r'[^\w\s]|_')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def description_fingerprint(description):
+    """Normalize a narration so repeat payees map to the same key"""
+    text = str(description or "")
+    text = _DATE_RE.sub(" ", text)
+    text = _AMOUNT_RE.sub(" ", text)
+    text = _SEPARATOR_RE.sub(" ", text)
+    text = _REFERENCE_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+class CategorizationCache:
+    def __init__(self, path=None, max_entries=None, ttl=None):
+        self.path = path or os.getenv("CATEGORY_CACHE_PATH", os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'categorization.sqlite3'
+        ))
+        self.max_entries = int(max_entries or os.getenv("CATEGORY_CACHE_MAX_ENTRIES", 10000))
+        self.ttl = float(ttl or os.getenv("CATEGORY_CACHE_TTL", 30 * 24 * 3600))
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS category_cache ("
+            "key TEXT PRIMARY KEY, category TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(txn):
+        """Cache key for a transaction, or None if the narration has no stable text"""
+        fingerprint = description_fingerprint(txn.get("description"))
+        if not fingerprint:
+            return None
+        return f"{txn.get('type', '')}:{fingerprint}"
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Look up several keys, hitting SQLite at most once"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            missing = []
+            for key in set(keys):
+                entry = self._memory.get(key)
+                if entry and now - entry[1] < self.ttl:
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    self._memory.pop(key, None)
+                    missing.append(key)
+
+            if missing:
+                try:
+                    placeholders = ",".join("?" * len(missing))
+                    rows = self._conn.execute(
+                        f"SELECT key, category, updated_at FROM category_cache WHERE key IN ({placeholders})",
+                        missing
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logging.error(f"Categorization cache read failed: {str(e)}")
+                    rows = []
+                for key, category, updated_at in rows:
+                    if now - updated_at < self.ttl:
+                        found[key] = category
+                        self._remember(key, category, updated_at)
+
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set(self, key, category):
+        self.set_many({key: category})
+
+    def set_many(self, entries):
+        now = time.time()
+        with self._lock:
+            for key, category in entries.items():
+                self._remember(key, category, now)
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO category_cache (key, category, updated_at) VALUES (?, ?, ?)",
+                    [(key, category, now) for key, category in entries.items()]
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Categorization cache write failed: {str(e)}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
+
+    def _remember(self, key, category, updated_at):
+        self._memory[key] = (category, updated_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_categorization_cache():
+    """Process-wide cache shared by every upload"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CategorizationCache()
+        return _cache
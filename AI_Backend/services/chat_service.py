@@ -1,56 +1,162 @@
-from langchain.chains import ConversationChain
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_groq import ChatGroq
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+import logging
 import os
+import threading
+
+from services.async_runtime import hold
+from services.chat_sessions import get_chat_session_store
+from services.llm import create_llm
+
+# Token budget for the verbatim window of recent turns; once exceeded the
+# oldest turns are folded into the summary until the window is back to half
+WINDOW_TOKENS = int(os.getenv("CHAT_WINDOW_TOKENS", 1500))
+SUMMARY_WORDS = int(os.getenv("CHAT_SUMMARY_WORDS", 200))
+
+summary_prompt = PromptTemplate(
+    input_variables=["summary", "turns", "words"],
+    template="""
+    Update the running summary of a conversation with the turns below.
+    Keep facts, numbers, decisions and open questions; drop pleasantries.
+    Reply with the new summary only, at most {words} words.
+
+    Current summary:
+    {summary}
+
+    Turns to add:
+    {turns}
+    """
+)
+
 
 class ChatService:
-    def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0.5,
-            model_name="llama-3.3-70b-versatile",
-            groq_api_key=os.getenv("GROQ_API_KEY")
-        )
+    def __init__(self, llm=None, store=None):
+        self.llm = llm or create_llm("chat", temperature=0.5)
+        self.store = store or get_chat_session_store()
         self.prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a helpful AI assistant. Maintain context between messages."),
+            ("system", "You are a helpful AI assistant. Maintain context between messages.{summary}"),
             MessagesPlaceholder(variable_name="history"),
             ("human", "{input}")
         ])
-        # Initialize an empty conversation history if needed
-        self.conversation_history = []
-
-    def process_message(self, user_message, history=None):
-        # Use provided history or default to empty list
-        if history is None:
-            history = self.conversation_history
-        
-        # Create memory from history
-        memory = ConversationBufferMemory(return_messages=True)
-        for msg in history:
-            if msg.startswith("Human:"):
-                memory.chat_memory.add_user_message(msg.replace("Human: ", ""))
-            elif msg.startswith("AI:"):
-                memory.chat_memory.add_ai_message(msg.replace("AI: ", ""))
-
-        # Create conversation chain
-        conversation = ConversationChain(
-            llm=self.llm,
-            memory=memory,
-            prompt=self.prompt,
-            verbose=False
-        )
-
-        # Get response
-        response = conversation.predict(input=user_message)
-        
-        # Update conversation history
-        new_history = [
-            *history,
-            f"Human: {user_message}",
-            f"AI: {response}"
+        self.chain = self.prompt | self.llm
+        self.summary_chain = summary_prompt | self.llm
+
+    def process_message(self, session_id, user_message):
+        session = self.store.get(session_id)
+        # One message at a time per session so turns stay in order
+        with session.lock:
+            response = self.chain.invoke(self._inputs(session, user_message)).content
+            self._record_turn(session, user_message, response)
+        return response
+
+    def stream_message(self, session_id, user_message):
+        """Yield the response token by token; the turn is recorded only once the
+        model finishes. Closing the generator (client gone) closes the upstream
+        stream, which stops generation, and leaves the history untouched."""
+        session = self.store.get(session_id)
+        with session.lock:
+            stream = self.chain.stream(self._inputs(session, user_message))
+            parts = []
+            try:
+                for chunk in stream:
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            finally:
+                stream.close()
+            self._record_turn(session, user_message, "".join(parts))
+
+    async def aprocess_message(self, session_id, user_message):
+        """process_message on the event loop; cancelling it aborts the LLM call
+        and leaves the history untouched"""
+        session = self.store.get(session_id)
+        async with session.async_lock, hold(session.lock):
+            response = (await self.chain.ainvoke(self._inputs(session, user_message))).content
+            await self._arecord_turn(session, user_message, response)
+        return response
+
+    async def astream_message(self, session_id, user_message):
+        """stream_message on the event loop"""
+        session = self.store.get(session_id)
+        async with session.async_lock, hold(session.lock):
+            stream = self.chain.astream(self._inputs(session, user_message))
+            parts = []
+            try:
+                async for chunk in stream:
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+            finally:
+                await stream.aclose()
+            await self._arecord_turn(session, user_message, "".join(parts))
+
+    def history(self, session_id):
+        session = self.store.get(session_id)
+        with session.lock:
+            return {
+                "summary": session.summary,
+                "messages": [f"{'Human' if role == 'human' else 'AI'}: {text}" for role, text, _ in session.turns],
+                "turn_count": session.turn_count
+            }
+
+    def end_session(self, session_id):
+        self.store.delete(session_id)
+
+    def _inputs(self, session, user_message):
+        history = [
+            HumanMessage(content=text) if role == "human" else AIMessage(content=text)
+            for role, text, _ in session.turns
         ]
-        
-        # Store the updated history
-        self.conversation_history = new_history
-        
-        return response, new_history
\ No newline at end of file
+        summary = f"\n\nSummary of the earlier conversation:\n{session.summary}" if session.summary else ""
+        return {"summary": summary, "history": history, "input": user_message}
+
+    def _record_turn(self, session, user_message, response):
+        session.append("human", user_message)
+        session.append("ai", response)
+        if session.window_tokens > WINDOW_TOKENS:
+            self._compact(session)
+
+    async def _arecord_turn(self, session, user_message, response):
+        session.append("human", user_message)
+        session.append("ai", response)
+        if session.window_tokens > WINDOW_TOKENS:
+            await self._acompact(session)
+
+    def _summary_inputs(self, session):
+        evicted = session.evict(WINDOW_TOKENS // 2)
+        if not evicted:
+            return None
+        turns = "\n".join(f"{'Human' if role == 'human' else 'AI'}: {text}" for role, text in evicted)
+        return {"summary": session.summary or "(none)", "turns": turns, "words": SUMMARY_WORDS}
+
+    def _compact(self, session):
+        inputs = self._summary_inputs(session)
+        if not inputs:
+            return
+        try:
+            session.summary = self.summary_chain.invoke(inputs).content.strip()
+        except Exception as e:
+            # The evicted turns are dropped; the previous summary still stands
+            logging.error(f"Chat summary update failed: {str(e)}")
+
+    async def _acompact(self, session):
+        inputs = self._summary_inputs(session)
+        if not inputs:
+            return
+        try:
+            session.summary = (await self.summary_chain.ainvoke(inputs)).content.strip()
+        except Exception as e:
+            # The evicted turns are dropped; the previous summary still stands
+            logging.error(f"Chat summary update failed: {str(e)}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_chat_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChatService()
+        return _service
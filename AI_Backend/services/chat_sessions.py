@@ -0,0 +1,90 @@
+# services/chat_sessions.py
+from collections import OrderedDict, deque
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+class ChatSession:
+    """One conversation: a rolling summary of old turns plus a recent window.
+
+    Turns are appended and evicted at the deque ends, so both are O(1); the
+    window's token total is tracked alongside instead of being recounted.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.summary = ""
+        self.turns = deque()
+        self.window_tokens = 0
+        self.turn_count = 0
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+        # Async turns queue here, so only one of them at a time waits on lock
+        self.async_lock = asyncio.Lock()
+
+    def append(self, role, text):
+        tokens = estimate_tokens(text)
+        self.turns.append((role, text, tokens))
+        self.window_tokens += tokens
+        self.turn_count += 1
+        self.last_used = time.time()
+
+    def evict(self, target_tokens):
+        """Pop the oldest turns until the window fits target_tokens.
+
+        The latest exchange is always kept; evicted turns are returned so the
+        caller can fold them into the summary.
+        """
+        evicted = []
+        while self.window_tokens > target_tokens and len(self.turns) > 2:
+            role, text, tokens = self.turns.popleft()
+            self.window_tokens -= tokens
+            evicted.append((role, text))
+        return evicted
+
+
+class ChatSessionStore:
+    """In-memory sessions keyed by id, bounded by count and idle time"""
+
+    def __init__(self, max_sessions=None, idle_ttl=None):
+        self.max_sessions = int(max_sessions or os.getenv("CHAT_MAX_SESSIONS", 10000))
+        self.idle_ttl = float(idle_ttl or os.getenv("CHAT_SESSION_TTL", 24 * 3600))
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self):
+        return self.get(uuid.uuid4().hex)
+
+    def get(self, session_id):
+        """Existing session for the id, or a fresh one if it expired or never existed"""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session.last_used > self.idle_ttl:
+                session = ChatSession(session_id)
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        return {"sessions": len(self._sessions)}
+
+
+_store = ChatSessionStore()
+
+
+def get_chat_session_store():
+    return _store
@@ -0,0 +1,160 @@
+# services/deduction_classifier.py
+from langchain_core.prompts import PromptTemplate
+import json
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from services.categorization_cache import description_fingerprint
+
+# Batch Deduction Template
+batch_deduction_template = """
+Decide which tax deduction section, if any, each of these payments qualifies for.
+Sections and the payments they cover: {sections}
+
+Payments (one JSON object per line, "id" identifies the row):
+{transactions}
+
+Return ONLY a JSON object mapping every id to a section name, or null if the
+payment is not deductible. Example:
+{{"0": "80C", "1": null}}
+"""
+
+batch_deduction_prompt = PromptTemplate.from_template(batch_deduction_template)
+
+# Transaction types that are money coming in and never a deductible payment
+_INCOME_TYPES = {"income", "credit", "cr"}
+
+
+def _phrase_pattern(phrase):
+    words = [re.escape(word) for word in phrase.split()]
+    return r'\b' + r'\s+'.join(words) + r'\b'
+
+
+class DeductionClassifier:
+    """Keyword rules from deduction_categories first, the LLM only for leftovers.
+
+    A payment whose narration contains a full keyword ("Health Insurance") is
+    classified locally; longer keywords win, so that beats 80C's "Insurance".
+    A payment that only shares a word with a keyword ("HDFC LOAN EMI") is
+    ambiguous and goes to the LLM, all such rows in one prompt. Everything
+    else is treated as non-deductible without asking.
+    """
+
+    def __init__(self, llm, categories, limits=None):
+        self.llm = llm
+        self.categories = categories
+        self.limits = limits or {}
+        self.llm_calls = 0
+
+        keywords = [(keyword, section) for section, words in categories.items() for keyword in words]
+        keywords.sort(key=lambda item: len(item[0]), reverse=True)
+        self.rules = [(re.compile(_phrase_pattern(keyword), re.IGNORECASE), section) for keyword, section in keywords]
+
+        full_keywords = {keyword.lower() for keyword, _ in keywords}
+        hints = sorted({
+            word.lower() for keyword, _ in keywords for word in keyword.split()
+            if len(word) > 2 and word.lower() not in full_keywords
+        })
+        self.hint_pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, hints)) + r')\b', re.IGNORECASE) if hints else None
+
+    def classify(self, transactions):
+        """Deductions found in the transactions, with per-section caps applied"""
+        if not transactions:
+            return {"deductions": [], "sections": self._sections({}), "llm_rows": 0}
+
+        df = pd.DataFrame(transactions)
+        description = self._column(df, "description", "narration", "note").fillna("").astype(str)
+        amount = pd.to_numeric(self._column(df, "amount"), errors="coerce").fillna(0.0).abs()
+        kind = self._column(df, "type").fillna("").astype(str).str.lower()
+        payment = ~kind.isin(_INCOME_TYPES) & (amount > 0)
+
+        section = pd.Series(None, index=df.index, dtype=object)
+        for pattern, name in self.rules:
+            matched = payment & section.isna() & description.str.contains(pattern)
+            section[matched] = name
+        source = pd.Series(np.where(section.notna(), "rule", None), index=df.index, dtype=object)
+
+        hinted = description.str.contains(self.hint_pattern) if self.hint_pattern is not None else False
+        ambiguous = payment & section.isna() & hinted
+        ambiguous_rows = np.flatnonzero(ambiguous.to_numpy())
+        if len(ambiguous_rows):
+            # Repeat payees (same narration bar dates/refs) are asked about once
+            groups = {}
+            for row in ambiguous_rows:
+                key = description_fingerprint(description.iat[row]) or ("row", row)
+                groups.setdefault(key, []).append(row)
+            representatives = [rows[0] for rows in groups.values()]
+            mapping = self._classify_with_llm(representatives, description, amount)
+            for rows in groups.values():
+                name = mapping.get(rows[0])
+                if name:
+                    section.iloc[rows] = name
+                    source.iloc[rows] = "llm"
+
+        deductions = [
+            {
+                "section": section.iat[row],
+                "amount": float(amount.iat[row]),
+                "description": description.iat[row],
+                "source": source.iat[row]
+            }
+            for row in np.flatnonzero(section.notna().to_numpy())
+        ]
+        claimed = amount[section.notna()].groupby(section[section.notna()]).sum().to_dict()
+        return {"deductions": deductions, "sections": self._sections(claimed), "llm_rows": len(ambiguous_rows)}
+
+    def _sections(self, claimed):
+        """Claimed vs allowed per section; sections without a limit are uncapped"""
+        sections = {}
+        for name in self.categories:
+            total = float(claimed.get(name, 0.0))
+            limit = self.limits.get(name)
+            sections[name] = {
+                "claimed": total,
+                "allowed": min(total, float(limit)) if limit is not None else total,
+                "limit": limit
+            }
+        return sections
+
+    def _classify_with_llm(self, rows, description, amount):
+        """One prompt for every ambiguous row; returns {row: section}"""
+        lines = [
+            json.dumps({"id": int(row), "description": description.iat[row], "amount": float(amount.iat[row])})
+            for row in rows
+        ]
+        try:
+            chain = batch_deduction_prompt | self.llm
+            self.llm_calls += 1
+            raw = chain.invoke({
+                "sections": json.dumps(self.categories),
+                "transactions": "\n".join(lines)
+            }).content
+
+            json_match = re.search(r'\{.*\}', raw, re.DOTALL)
+            if not json_match:
+                raise ValueError("No JSON object in deduction response")
+            parsed = json.loads(json_match.group(0))
+        except Exception as e:
+            logging.error(f"Deduction classification failed: {str(e)}")
+            return {}
+
+        expected = {int(row) for row in rows}
+        mapping = {}
+        for key, value in parsed.items():
+            try:
+                row = int(key)
+            except (TypeError, ValueError):
+                continue
+            if row in expected and value in self.categories:
+                mapping[row] = value
+        return mapping
+
+    @staticmethod
+    def _column(df, *names):
+        for name in names:
+            if name in df:
+                return df[name]
+        return pd.Series(None, index=df.index, dtype=object)
@@ -1,10 +1,15 @@
 # services/fraud_detector.py
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel
+from services.behavior_profile import get_profile_store
+from services.analysis_memo import get_analysis_memo
+from services.behavior_digest import build_digest
+from services.llm import create_llm
+import asyncio
 import json
 import logging
+import threading
 
 # Define strict output schema
 class FraudAnalysisResult(BaseModel):
@@ -19,55 +24,51 @@ class BehaviorAnalysisResult(BaseModel):
     anomalies: list
     overall_risk_trend: str
 
+def _compact(data):
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+def load_transaction_history(user_id):
+    """Load real transaction data from Firestore"""
+    try:
+        # Placeholder implementation - replace with actual Firestore code
+        # For now, return an empty list instead of [...]
+        return []
+        
+        # When implementing the real version:
+        # db = firestore.client()
+        # transactions_ref = db.collection('transactions').where('user_id', '==', user_id)
+        # transactions = [doc.to_dict() for doc in transactions_ref.stream()]
+        # return transactions
+    except Exception as e:
+        logging.error(f"Failed to load transaction history: {str(e)}")
+        return []
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_fraud_llm():
+    """One client shared by every detector instead of one per request"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = create_llm("fraud", temperature=0)  # More deterministic
+        return _llm
+
 class AdvancedFraudDetector:
     def __init__(self, user_id):
         self.user_id = user_id
-        self.llm = ChatGroq(temperature=0, model_name="llama-3.3-70b-versatile")  # More deterministic
+        self.llm = get_fraud_llm()
         self.parser = JsonOutputParser(pydantic_object=FraudAnalysisResult)
         self.transaction_history = self._load_transaction_history()
 
     def _load_transaction_history(self):
         """Load real transaction data from Firestore"""
-        try:
-            # Placeholder implementation - replace with actual Firestore code
-            # For now, return an empty list instead of [...]
-            return []
-            
-            # When implementing the real version:
-            # db = firestore.client()
-            # transactions_ref = db.collection('transactions').where('user_id', '==', self.user_id)
-            # transactions = [doc.to_dict() for doc in transactions_ref.stream()]
-            # return transactions
-        except Exception as e:
-            logging.error(f"Failed to load transaction history: {str(e)}")
-            return []
+        return load_transaction_history(self.user_id)
 
     def _get_behavior_profile(self):
-        """Generate a behavior profile based on transaction history"""
-        try:
-            # Extract key behavioral patterns from transaction history
-            if not self.transaction_history:
-                return {"user_id": self.user_id, "profile_status": "insufficient_data"}
-            
-            # Calculate basic metrics
-            transaction_count = len(self.transaction_history)
-            avg_amount = sum(tx.get('amount', 0) for tx in self.transaction_history) / max(transaction_count, 1)
-            
-            # Get unique merchants/categories
-            merchants = set(tx.get('merchant', '') for tx in self.transaction_history)
-            categories = set(tx.get('category', '') for tx in self.transaction_history)
-            
-            return {
-                "user_id": self.user_id,
-                "transaction_count": transaction_count,
-                "average_amount": avg_amount,
-                "merchant_diversity": len(merchants),
-                "category_diversity": len(categories),
-                "profile_status": "active" if transaction_count > 0 else "new_user"
-            }
-        except Exception as e:
-            logging.error(f"Failed to generate behavior profile: {str(e)}")
-            return {"user_id": self.user_id, "profile_status": "error", "error": str(e)}
+        """Incrementally maintained behavior profile for this user"""
+        # History is only replayed the first time this process sees the user
+        return get_profile_store().get(self.user_id, self.transaction_history)
 
     def analyze_transaction(self, transaction):
         """Analyze a transaction for potential fraud"""
@@ -82,18 +83,12 @@ class AdvancedFraudDetector:
             elif hasattr(transaction, 'model_dump') and callable(getattr(transaction, 'model_dump')):
                 transaction_data = transaction.model_dump()
             
-            # Perform analysis
-            result = {
-                "success": True,
-                "is_anomalous": False,
-                "risk_score": 0,
-                "primary_reason": "",
-                "supporting_evidence": "",
-                "confidence": 0.0
-            }
-            
-            # Basic analysis logic
-            # This is where we would implement actual fraud detection algorithms
+            # Score against the profile (O(1)); only transactions that don't look
+            # fraudulent move the baseline, and a retry is only counted once
+            with behavior_profile.lock:
+                result = behavior_profile.score(transaction_data)
+                if not result["is_anomalous"]:
+                    behavior_profile.update(transaction_data)
             
             return result
             
@@ -109,25 +104,36 @@ class AdvancedFraudDetector:
             }
 
     def detect_behavior_anomalies(self):
-        """Strict behavior pattern analysis"""
+        """Strict behavior pattern analysis, memoized on the history's rolling hash"""
         try:
-            prompt = PromptTemplate(
-                template="""
-                Analyze transaction history. Return JSON ONLY:
-                {schema}
-                
-                Transactions:
-                {history}
-                """,
-                input_variables=["history"],
-                partial_variables={"schema": BehaviorAnalysisResult.schema_json()}
-            )
+            memo, history_hash, cached, chain, inputs = self._behavior_request()
+            
+            # Unchanged history: no LLM round-trip at all
+            if cached is not None:
+                return cached
+            
+            result = chain.invoke(inputs)
+            memo.store(self.user_id, self.transaction_history, history_hash, result)
+            return result
             
-            chain = prompt | self.llm | JsonOutputParser(pydantic_object=BehaviorAnalysisResult)
+        except Exception as e:
+            logging.error(f"Behavior analysis failed: {str(e)}")
+            return BehaviorAnalysisResult(
+                total_anomalies=0,
+                anomalies=[],
+                overall_risk_trend="Analysis failed"
+            )
+
+    async def adetect_behavior_anomalies(self):
+        """detect_behavior_anomalies on the event loop; the digest is built off it"""
+        try:
+            memo, history_hash, cached, chain, inputs = await asyncio.to_thread(self._behavior_request)
+            if cached is not None:
+                return cached
             
-            return chain.invoke({
-                "history": json.dumps(self.transaction_history)
-            })
+            result = await chain.ainvoke(inputs)
+            memo.store(self.user_id, self.transaction_history, history_hash, result)
+            return result
             
         except Exception as e:
             logging.error(f"Behavior analysis failed: {str(e)}")
@@ -137,6 +143,48 @@ class AdvancedFraudDetector:
                 overall_risk_trend="Analysis failed"
             )
 
+    def _behavior_request(self):
+        """(memo, history hash, memoized result or None, chain, chain inputs)"""
+        memo = get_analysis_memo()
+        previous, delta, history_hash = memo.lookup(self.user_id, self.transaction_history)
+        if previous is not None and not delta:
+            return memo, history_hash, previous, None, None
+        
+        if previous is not None:
+            # Only the new rows go to the LLM, alongside the last summary
+            prompt = PromptTemplate(
+                template="""
+                Update this behavior analysis with a statistical digest of the new transactions. Return JSON ONLY:
+                {schema}
+                
+                Previous analysis:
+                {previous}
+                
+                New transactions digest:
+                {history}
+                """,
+                input_variables=["previous", "history"],
+                partial_variables={"schema": BehaviorAnalysisResult.schema_json()}
+            )
+            inputs = {"previous": _compact(previous), "history": _compact(build_digest(self.user_id, delta))}
+        else:
+            prompt = PromptTemplate(
+                template="""
+                Analyze this statistical digest of the user's transaction history. Return JSON ONLY:
+                {schema}
+                
+                History digest:
+                {history}
+                """,
+                input_variables=["history"],
+                partial_variables={"schema": BehaviorAnalysisResult.schema_json()}
+            )
+            # Bounded-size statistics instead of every raw transaction
+            inputs = {"history": _compact(build_digest(self.user_id, self.transaction_history))}
+        
+        chain = prompt | self.llm | JsonOutputParser(pydantic_object=BehaviorAnalysisResult)
+        return memo, history_hash, None, chain, inputs
+
     def behavior_analysis(self, transaction_data):
         """Analyze user behavior patterns for anomalies"""
         try:
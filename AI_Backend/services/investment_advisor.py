@@ -1,36 +1,31 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
+import asyncio
 import json
 import logging
 import os
+import threading
 
-class InvestmentAdvisor:
-    def __init__(self):
-        self.llm = ChatGroq(temperature=0.3, model_name="llama-3.3-70b-versatile")
-        # Get the directory where this file is located
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Go up one level to the AI_Backend directory
-        backend_dir = os.path.dirname(current_dir)
-        # Construct path to data file
-        data_file = os.path.join(backend_dir, 'data', 'investment_schemes.json')
-        
-        try:
-            with open(data_file) as f:
-                self.schemes = json.load(f)
-        except FileNotFoundError:
-            logging.error(f"Could not find investment schemes file at: {data_file}")
-            self.schemes = []
-            
-        # Configure logging
-        logging.basicConfig(level=logging.INFO)
+from services.llm import create_llm
+from services.metrics import timed
+from services.scheme_catalogue import get_scheme_catalogue, normalize_profile
+from services.single_flight import SingleFlight, content_key
 
-    def get_recommendations(self, user_profile):
-        try:
-            # Improved prompt with JSON example
-            prompt = PromptTemplate.from_template("""
-            Analyze user profile and recommend investments. 
+# Schemes shortlisted locally and passed on to the LLM
+TOP_K = int(os.getenv("INVESTMENT_TOP_K", 5))
+
+# Identical profiles posted concurrently share one narrative call
+_flights = SingleFlight("investment_recommendations")
+
+class InvestmentAdvisor:
+    def __init__(self, catalogue=None):
+        self.llm = create_llm("investment", temperature=0.3)
+        self.catalogue = catalogue or get_scheme_catalogue()
+        self.prompt = PromptTemplate.from_template("""
+            Explain these investment recommendations for the user. The schemes are
+            already shortlisted and scored; keep their order and scores, and write
+            specific reasons and an allocation for each.
             USER PROFILE: {profile}
-            SCHEMES: {schemes}
+            SHORTLIST: {schemes}
 
             Return ONLY valid JSON without markdown. Example:
             {{
@@ -44,29 +39,111 @@ class InvestmentAdvisor:
                 ]
             }}
             """)
+        self.chain = self.prompt | self.llm
 
-            chain = prompt | self.llm
-            response = chain.invoke({
-                "profile": json.dumps(user_profile, indent=2),
-                "schemes": json.dumps(self.schemes, indent=2)
-            })
+        # Configure logging
+        logging.basicConfig(level=logging.INFO)
 
-            # Log raw response for debugging
-            logging.info(f"Raw LLM Response: {response.content}")
+    def get_recommendations(self, user_profile, scores_only=False):
+        # Raises ProfileError for bad input, before any ranking or LLM call
+        user_profile = normalize_profile(user_profile)
+        if scores_only:
+            return {"recommendations": self._rank(user_profile)}
+        return _flights.do(content_key(user_profile), self._recommend, user_profile)
 
-            # Handle empty response
-            if not response.content.strip():
-                raise ValueError("Empty response from LLM")
+    def _recommend(self, user_profile):
+        ranked = self._rank(user_profile)
+        if not ranked:
+            return {"recommendations": ranked}
 
-            # Extract JSON from response
-            json_str = response.content.split('```json')[1].split('```')[0] if '```json' in response.content else response.content
-            json_str = json_str.replace("'", '"').strip()
-            
-            return json.loads(json_str)
+        try:
+            with timed("investment_narrative"):
+                response = self.chain.invoke(self._narrative_inputs(user_profile, ranked))
+            return self._parse(ranked, response)
 
         except json.JSONDecodeError as e:
             logging.error(f"JSON Parse Error: {str(e)}")
-            return {"error": f"Invalid JSON format: {str(e)}"}
         except Exception as e:
             logging.error(f"Recommendation Error: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+        # The local ranking still stands when the narrative step fails
+        return {"recommendations": ranked}
+
+    async def aget_recommendations(self, user_profile, scores_only=False):
+        """get_recommendations with the narrative call made on the event loop;
+        the numpy ranking runs in a worker thread"""
+        user_profile = normalize_profile(user_profile)
+        if scores_only:
+            return {"recommendations": await asyncio.to_thread(self._rank, user_profile)}
+        return await _flights.ado(content_key(user_profile), lambda: self._arecommend(user_profile))
+
+    async def _arecommend(self, user_profile):
+        ranked = await asyncio.to_thread(self._rank, user_profile)
+        if not ranked:
+            return {"recommendations": ranked}
+
+        try:
+            with timed("investment_narrative"):
+                response = await self.chain.ainvoke(self._narrative_inputs(user_profile, ranked))
+            return self._parse(ranked, response)
+
+        except json.JSONDecodeError as e:
+            logging.error(f"JSON Parse Error: {str(e)}")
+        except Exception as e:
+            logging.error(f"Recommendation Error: {str(e)}")
+        return {"recommendations": ranked}
+
+    def _rank(self, user_profile):
+        with timed("investment_ranking"):
+            return self.catalogue.rank(user_profile, top_k=TOP_K)
+
+    def _narrative_inputs(self, user_profile, ranked):
+        # Only the shortlist goes to the LLM, so the prompt doesn't grow with the catalogue
+        shortlist = [
+            {**scheme, "match_score": rec["match_score"], "suggested_allocation": rec["suggested_allocation"]}
+            for scheme, rec in zip(self.catalogue.compact([rec["scheme"] for rec in ranked]), ranked)
+        ]
+        return {
+            "profile": json.dumps(user_profile, separators=(",", ":")),
+            "schemes": json.dumps(shortlist, separators=(",", ":"))
+        }
+
+    def _parse(self, ranked, response):
+        # Log raw response for debugging
+        logging.info(f"Raw LLM Response: {response.content}")
+
+        # Handle empty response
+        if not response.content.strip():
+            raise ValueError("Empty response from LLM")
+
+        # Extract JSON from response
+        json_str = response.content.split('```json')[1].split('```')[0] if '```json' in response.content else response.content
+        json_str = json_str.replace("'", '"').strip()
+
+        return self._merge(ranked, json.loads(json_str))
+
+    @staticmethod
+    def _merge(ranked, narrative):
+        """Keep the local scores; take reasons and allocations from the LLM
+        for shortlisted schemes only"""
+        written = {rec.get("scheme"): rec for rec in narrative.get("recommendations", []) if isinstance(rec, dict)}
+        merged = []
+        for rec in ranked:
+            llm_rec = written.get(rec["scheme"], {})
+            merged.append({
+                **rec,
+                "reasons": llm_rec.get("reasons") or rec["reasons"],
+                "suggested_allocation": llm_rec.get("suggested_allocation", rec["suggested_allocation"])
+            })
+        return {"recommendations": merged}
+
+
+_advisor = None
+_advisor_lock = threading.Lock()
+
+
+def get_investment_advisor():
+    global _advisor
+    with _advisor_lock:
+        if _advisor is None:
+            _advisor = InvestmentAdvisor()
+        return _advisor
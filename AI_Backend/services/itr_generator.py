@@ -0,0 +1,238 @@
+# services/itr_generator.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, RawIOBase
+import json
+import os
+import re
+import threading
+import zipfile
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from services.tax_engine import get_tax_engine, DEFAULT_COUNTRY, DEFAULT_FY
+
+# Self-occupied home loan interest cap under section 24(b)
+HOUSE_PROPERTY_INTEREST_LIMIT = 200000
+
+# (section, field key, label) rows of the printed form, top to bottom
+ITR1_LAYOUT = [
+    ("personal_info", "name", "Name"),
+    ("personal_info", "pan", "PAN"),
+    ("personal_info", "assessment_year", "Assessment Year"),
+    ("personal_info", "new_regime_115bac", "Opted for new regime u/s 115BAC"),
+    ("income_details", "gross_salary", "B1 Gross salary"),
+    ("income_details", "standard_deduction", "B2 Standard deduction u/s 16(ia)"),
+    ("income_details", "income_from_salary", "B3 Income chargeable under Salaries"),
+    ("income_details", "house_property", "B4 Income from house property"),
+    ("income_details", "gross_total_income", "B5 Gross total income"),
+    ("deductions", "section_80C", "C1 Deduction u/s 80C"),
+    ("deductions", "section_80D", "C2 Deduction u/s 80D"),
+    ("deductions", "total", "C3 Total deductions (Chapter VI-A)"),
+    ("income_details", "taxable_income", "C4 Total taxable income"),
+    ("tax_computation", "tax_on_total_income", "D1 Tax payable on total income"),
+    ("tax_computation", "rebate_87a", "D2 Rebate u/s 87A"),
+    ("tax_computation", "tax_after_rebate", "D3 Tax payable after rebate"),
+    ("tax_computation", "health_education_cess", "D4 Health and education cess"),
+    (None, "tax_payable", "D5 Total tax liability")
+]
+
+_TOP = 760
+_ROW_HEIGHT = 24
+_LABEL_X = 60
+_VALUE_X = 400
+
+# Plain zlib streams: ASCII85 on top only suits 7-bit transports, and without
+# reportlab's C accelerator its encoder is a noticeable share of each render
+rl_config.useA85 = 0
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=int(os.getenv("ITR_RENDER_WORKERS", os.cpu_count() or 1)))
+        return _pool
+
+
+def assessment_year(fy_label):
+    """"2023-24" (financial year) -> "2024-25" """
+    match = re.match(r'(\d{4})-(\d{2})$', str(fy_label or ""))
+    if not match:
+        return fy_label
+    start = int(match.group(1)) + 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def map_itr1(tax_data, personal_info=None):
+    """ITR-1 fields from calculate_tax output; no LLM involved"""
+    engine = get_tax_engine()
+    country = tax_data.get("country") or DEFAULT_COUNTRY
+    fy = tax_data.get("fy") or DEFAULT_FY
+    regime = tax_data.get("regime") or tax_data.get("optimal_regime")
+    table = engine.table(country, fy, regime)
+    computed = (tax_data.get("regimes") or {}).get(regime, {})
+
+    sections = (tax_data.get("deductions") or {}).get("sections", {})
+    allowed = {name: float(section.get("allowed", 0)) for name, section in sections.items()}
+    if not table.deduction_limits:
+        # The new regime allows none of these deductions
+        allowed = {}
+
+    taxable_income = float(tax_data.get("taxable_income", computed.get("taxable_income", 0)))
+    interest = min(allowed.get("24", 0.0), HOUSE_PROPERTY_INTEREST_LIMIT)
+    chapter_via = {key: value for key, value in allowed.items() if key != "24"}
+    gross_salary = float(tax_data.get(
+        "gross_income", taxable_income + table.standard_deduction + interest + sum(chapter_via.values())
+    ))
+    income_from_salary = max(gross_salary - table.standard_deduction, 0.0)
+
+    slab_tax = float(computed.get("slab_tax", 0))
+    rebate = float(computed.get("rebate", 0))
+    personal_info = personal_info or tax_data.get("personal_info") or {}
+    label = engine.data.get(country, {}).get(fy, {}).get("label")
+
+    return {
+        "form": "ITR-1",
+        "personal_info": {
+            "name": personal_info.get("name", ""),
+            "pan": personal_info.get("pan", ""),
+            "assessment_year": assessment_year(label or fy),
+            "new_regime_115bac": "Yes" if regime == "new" else "No"
+        },
+        "income_details": {
+            "gross_salary": gross_salary,
+            "standard_deduction": table.standard_deduction,
+            "income_from_salary": income_from_salary,
+            "house_property": -interest,
+            "gross_total_income": income_from_salary - interest,
+            "taxable_income": taxable_income
+        },
+        "deductions": {
+            "section_80C": chapter_via.get("80C", 0.0),
+            "section_80D": chapter_via.get("80D", 0.0),
+            "total": sum(chapter_via.values())
+        },
+        "tax_computation": {
+            "tax_on_total_income": slab_tax,
+            "rebate_87a": rebate,
+            "tax_after_rebate": slab_tax - rebate,
+            "health_education_cess": float(computed.get("cess", 0))
+        },
+        "tax_payable": float(tax_data.get("total_tax", computed.get("total_tax", 0)))
+    }
+
+
+def _template_layout():
+    """Row labels, top to bottom, and the rule under each row"""
+    labels = tuple(label for _, _, label in ITR1_LAYOUT)
+    rules = tuple(
+        (_LABEL_X, _TOP - row * _ROW_HEIGHT - 6, 540, _TOP - row * _ROW_HEIGHT - 6) for row in range(len(labels))
+    )
+    return labels, rules
+
+
+# Computed once per process (once per bulk render worker)
+_LABELS, _RULES = _template_layout()
+
+
+def _draw_template(pdf):
+    """Static part of the page: title, rules and every row label"""
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(_LABEL_X, _TOP + 40, "ITR-1 (SAHAJ) - Indian Income Tax Return")
+    # Rows are evenly spaced, so one text object with the row height as leading sets every label
+    text = pdf.beginText(_LABEL_X, _TOP)
+    text.setFont("Helvetica", 10, leading=_ROW_HEIGHT)
+    text.textLines(_LABELS, trim=0)
+    pdf.drawText(text)
+    pdf.lines(_RULES)
+
+
+def render_itr_pdf(form):
+    """One-page PDF for a mapped form: the static template is drawn into a
+    form XObject from the precomputed layout, then only the values are drawn"""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    pdf.beginForm("itr1_template")
+    _draw_template(pdf)
+    pdf.endForm()
+
+    pdf.doForm("itr1_template")
+    pdf.setFont("Helvetica", 10)
+    for row, (section, key, _) in enumerate(ITR1_LAYOUT):
+        value = form.get(key) if section is None else form.get(section, {}).get(key, "")
+        text = f"{value:,.2f}" if isinstance(value, (int, float)) else str(value)
+        pdf.drawRightString(540, _TOP - row * _ROW_HEIGHT, text)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+class _ZipStream(RawIOBase):
+    """Write-only sink that hands back whatever zipfile wrote since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_name(index, form):
+    pan = re.sub(r'[^A-Za-z0-9]', '', str(form.get("personal_info", {}).get("pan", "")))
+    return f"ITR1_{index:05d}{'_' + pan if pan else ''}.pdf"
+
+
+def iter_itr_zip(items, window=None):
+    """Yield a ZIP of rendered ITR-1 PDFs chunk by chunk.
+
+    Rendering runs in a process pool over a sliding window: at most `window`
+    PDFs are in flight or waiting to be written, so memory stays bounded
+    however many forms are requested. Entries keep the input order.
+    """
+    window = int(window or os.getenv("ITR_RENDER_WINDOW", 2 * (os.cpu_count() or 1)))
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    pending = deque()
+    errors = []
+
+    def write_next():
+        index, form, future = pending.popleft()
+        try:
+            archive.writestr(_file_name(index, form), future.result())
+        except Exception as e:
+            errors.append({"index": index, "error": str(e)})
+
+    for index, item in enumerate(items):
+        try:
+            form = map_itr1(item.get("tax_data", item), item.get("personal_info"))
+        except Exception as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        pending.append((index, form, _get_pool().submit(render_itr_pdf, form)))
+        if len(pending) >= window:
+            write_next()
+            yield sink.drain()
+
+    while pending:
+        write_next()
+        yield sink.drain()
+
+    if errors:
+        archive.writestr("errors.json", json.dumps(errors, indent=2))
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,254 @@
+# services/job_queue.py
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a fixed pool of worker threads.
+
+    Payloads are written to disk next to the database, so queued and
+    interrupted jobs are picked up again after a restart. Several processes
+    (gunicorn workers, an old and a new deploy) can share one database:
+    a job is claimed with a conditional UPDATE and held under a lease the
+    owner keeps renewing, and only jobs whose lease has lapsed, i.e. whose
+    owner died, are handed to someone else.
+    """
+
+    def __init__(self, handler, name, workers=None, max_depth=None, result_ttl=None, path=None,
+                 lease=None, poll_interval=None):
+        self.handler = handler
+        self.name = name
+        self.workers = int(workers or os.getenv("JOB_WORKERS", 2))
+        self.max_depth = int(max_depth or os.getenv("JOB_QUEUE_MAX_DEPTH", 100))
+        self.result_ttl = float(result_ttl or os.getenv("JOB_RESULT_TTL", 24 * 3600))
+        self.lease = float(lease or os.getenv("JOB_LEASE_SECONDS", 60))
+        self.poll_interval = float(poll_interval or os.getenv("JOB_POLL_INTERVAL", 1))
+        # Unique per process, so a restarted process never mistakes old leases for its own
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.path = path or os.getenv("JOB_QUEUE_PATH", os.path.join(_BACKEND_DIR, 'cache', 'jobs'))
+        os.makedirs(self.path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._threads = []
+        # timeout: other processes may hold the write lock for a moment
+        self._conn = sqlite3.connect(
+            os.path.join(self.path, f"{name}.sqlite3"), timeout=30, check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, progress TEXT, result TEXT, error TEXT, "
+            "submitted_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "worker_id TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("worker_id", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at)")
+        self._conn.commit()
+
+    def start(self):
+        """Start the workers and requeue jobs whose owner's lease has expired"""
+        with self._lock:
+            if self._threads:
+                return
+            targets = [(f"{self.name}-worker-{i}", self._work) for i in range(self.workers)]
+            targets.append((f"{self.name}-heartbeat", self._heartbeat))
+            for thread_name, target in targets:
+                thread = threading.Thread(target=target, name=thread_name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        self._requeue_expired()
+
+    def submit(self, payload):
+        self.start()
+        self._purge_expired()
+        with self._lock:
+            depth = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if depth >= self.max_depth:
+            raise QueueFullError(f"{self.name} queue is full ({self.max_depth} jobs waiting)")
+
+        job_id = uuid.uuid4().hex
+        with open(self._payload_path(job_id), 'wb') as f:
+            f.write(payload)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, progress, submitted_at) VALUES (?, 'queued', '{}', ?)",
+                (job_id, time.time())
+            )
+            self._conn.commit()
+        with self._wake:
+            self._wake.notify()
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, progress, result, error, submitted_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+
+        job_id, status, progress, result, error, submitted_at, started_at, finished_at = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "progress": json.loads(progress or "{}"),
+            "submitted_at": submitted_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "wait_seconds": round((started_at or time.time()) - submitted_at, 3)
+        }
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = self._conn.execute(
+                "SELECT MIN(submitted_at) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            recent_wait = self._conn.execute(
+                "SELECT AVG(started_at - submitted_at) FROM (SELECT started_at, submitted_at FROM jobs "
+                "WHERE started_at IS NOT NULL ORDER BY started_at DESC LIMIT 100)"
+            ).fetchone()[0]
+        return {
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "completed": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "oldest_wait_seconds": round(now - oldest, 3) if oldest else 0.0,
+            "avg_wait_seconds": round(recent_wait or 0.0, 3)
+        }
+
+    def _work(self):
+        while True:
+            job_id = self._claim()
+            if job_id is None:
+                # Jobs submitted by other processes are only seen by polling
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logging.error(f"Job {job_id} crashed: {str(e)}")
+
+    def _claim(self):
+        """Take the oldest queued job, or None if another worker got them all"""
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY submitted_at LIMIT ?",
+                (self.workers,)
+            ).fetchall()
+            for (job_id,) in candidates:
+                now = time.time()
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker_id = ?, lease_until = ?, started_at = ? "
+                    "WHERE id = ? AND status = 'queued'",
+                    (self.worker_id, now + self.lease, now, job_id)
+                ).rowcount
+                self._conn.commit()
+                if claimed:
+                    return job_id
+        return None
+
+    def _heartbeat(self):
+        # Renew every lease this process holds well before it can lapse, and
+        # hand back jobs whose owner stopped renewing
+        while True:
+            time.sleep(self.lease / 3)
+            try:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE worker_id = ? AND status = 'running'",
+                        (time.time() + self.lease, self.worker_id)
+                    )
+                    self._conn.commit()
+                self._requeue_expired()
+            except sqlite3.Error as e:
+                logging.error(f"{self.name} heartbeat failed: {str(e)}")
+
+    def _requeue_expired(self):
+        with self._lock:
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_until = NULL, started_at = NULL "
+                "WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                (time.time(),)
+            ).rowcount
+            self._conn.commit()
+        if requeued:
+            logging.warning(f"{self.name}: requeued {requeued} job(s) whose worker stopped renewing its lease")
+            with self._wake:
+                self._wake.notify_all()
+
+    def _run(self, job_id):
+        payload_path = self._payload_path(job_id)
+        if not os.path.exists(payload_path):
+            self._update(job_id, status="failed", error="Job payload missing", finished_at=time.time())
+            return
+
+        progress = {}
+
+        def report(stage, **counts):
+            progress[stage] = counts or True
+            progress["stage"] = stage
+            self._update(job_id, progress=json.dumps(progress))
+
+        try:
+            with open(payload_path, 'rb') as f:
+                payload = f.read()
+            result = self.handler(payload, report)
+            finished = self._update(job_id, status="done", result=json.dumps(result), finished_at=time.time())
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            finished = self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+
+        if finished:
+            os.remove(payload_path)
+        else:
+            # The lease lapsed and the job went back to the queue; its new owner needs the payload
+            logging.warning(f"Job {job_id} lost its lease; result discarded")
+
+    def _update(self, job_id, **fields):
+        """Write fields if this process still owns the job; False if it doesn't"""
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            updated = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (*fields.values(), job_id, self.worker_id)
+            ).rowcount
+            self._conn.commit()
+        return updated > 0
+
+    def _purge_expired(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.result_ttl,)
+            )
+            self._conn.commit()
+
+    def _payload_path(self, job_id):
+        return os.path.join(self.path, f"{self.name}-{job_id}.bin")
@@ -0,0 +1,100 @@
+# services/llm.py
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_groq import ChatGroq
+
+from services.llm_cache import get_response_cache
+from services.metrics import llm_calls, llm_seconds, llm_tokens
+
+# Services whose calls are deterministic enough to cache unless told otherwise
+CACHED_BY_DEFAULT = {"tax", "fraud"}
+
+
+def cache_enabled(service):
+    """LLM_CACHE_<SERVICE>=1/0 opts a service in or out of the response cache"""
+    setting = os.getenv(f"LLM_CACHE_{service.upper()}")
+    if setting is None:
+        return service in CACHED_BY_DEFAULT
+    return setting.strip().lower() in ("1", "true", "yes", "on")
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Counts calls, latency and token usage for one service's LLM client"""
+
+    # A call cancelled mid-await gets neither end nor error callback, so the
+    # start times are capped rather than left to grow
+    MAX_PENDING = 4096
+
+    def __init__(self, service, model):
+        self.service = service
+        self.model = model
+        self._started = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+            while len(self._started) > self.MAX_PENDING:
+                self._started.popitem(last=False)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, "ok")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                llm_tokens.inc(tokens, service=self.service, model=self.model, kind=kind)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
+
+    def _finish(self, run_id, status):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        llm_calls.inc(service=self.service, model=self.model, status=status)
+        if started is not None:
+            llm_seconds.observe(time.perf_counter() - started, service=self.service, model=self.model)
+
+
+class GroqChat(ChatGroq):
+    """ChatGroq tagged with the service that owns it"""
+
+    service: str = "default"
+
+    def _get_llm_string(self, stop=None, **kwargs):
+        # Cache identity: service, model, temperature and per-call options
+        return json.dumps({
+            "service": self.service,
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "stop": stop,
+            **kwargs
+        }, sort_keys=True, default=str)
+
+
+def create_llm(service, model_name="llama-3.3-70b-versatile", temperature=0.7, **kwargs):
+    cached = cache_enabled(service)
+    if cached and get_llm_cache() is None:
+        set_llm_cache(get_response_cache())
+    return GroqChat(
+        service=service,
+        model_name=model_name,
+        temperature=temperature,
+        groq_api_key=kwargs.pop("groq_api_key", os.getenv("GROQ_API_KEY")),
+        # False bypasses the global cache even when another service installed it
+        cache=cached,
+        callbacks=[LLMMetricsHandler(service, model_name), *kwargs.pop("callbacks", [])],
+        **kwargs
+    )
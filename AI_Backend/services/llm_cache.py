@@ -0,0 +1,153 @@
+# services/llm_cache.py
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import warnings
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+DEFAULT_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+
+
+def service_ttl(service):
+    return float(os.getenv(f"LLM_CACHE_TTL_{service.upper()}", DEFAULT_TTL))
+
+
+class ResponseCache(BaseCache):
+    """Exact-match LangChain cache: in-memory LRU in front of SQLite.
+
+    Keys hash the llm_string (service, model, temperature, call options) with
+    the rendered prompt. The service name inside the llm_string selects the
+    TTL and the bucket its hits and misses are counted in.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'llm_responses.sqlite3'
+        ))
+        self.max_entries = int(max_entries or os.getenv("LLM_CACHE_MAX_ENTRIES", 2000))
+        self.counters = {}
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, service TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _service(llm_string):
+        try:
+            return json.loads(llm_string).get("service", "default")
+        except (ValueError, AttributeError):
+            return "default"
+
+    def lookup(self, prompt, llm_string):
+        key = self.make_key(prompt, llm_string)
+        service = self._service(llm_string)
+        ttl = service_ttl(service)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] < ttl:
+                self._memory.move_to_end(key)
+                self._count(service, "hits")
+                return entry[0]
+            self._memory.pop(key, None)
+
+            try:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.error(f"LLM cache read failed: {str(e)}")
+                row = None
+
+            if row and now - row[1] < ttl:
+                try:
+                    with warnings.catch_warnings():
+                        # langchain_core flags its (de)serializer as beta
+                        warnings.simplefilter("ignore")
+                        generations = loads(row[0])
+                    self._remember(key, generations, row[1])
+                    self._count(service, "hits")
+                    return generations
+                except Exception as e:
+                    logging.error(f"LLM cache entry unreadable: {str(e)}")
+
+            self._count(service, "misses")
+            return None
+
+    def update(self, prompt, llm_string, return_val):
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._remember(key, list(return_val), now)
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, service, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self._service(llm_string), dumps(list(return_val)), now)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"LLM cache write failed: {str(e)}")
+
+    def clear(self, **kwargs):
+        """Drop everything, or only one service's entries with service=..."""
+        service = kwargs.get("service")
+        with self._lock:
+            if service:
+                self._conn.execute("DELETE FROM llm_responses WHERE service = ?", (service,))
+            else:
+                self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+            # Memory entries aren't tagged by service, so start them over either way
+            self._memory.clear()
+
+    def stats(self):
+        services = {}
+        for service, counts in self.counters.items():
+            lookups = counts["hits"] + counts["misses"]
+            services[service] = {
+                **counts,
+                "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+                "ttl": service_ttl(service)
+            }
+        return {"services": services, "memory_entries": len(self._memory)}
+
+    def _count(self, service, outcome):
+        counts = self.counters.setdefault(service, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def _remember(self, key, generations, created_at):
+        self._memory[key] = (generations, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,179 @@
+# services/metrics.py
+from contextlib import contextmanager
+import bisect
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "coinwise_stage_duration_seconds", "Time spent in each processing stage", ["stage"]
+))
+llm_calls = registry.register(Counter(
+    "coinwise_llm_calls_total", "LLM calls by outcome", ["service", "model", "status"]
+))
+llm_seconds = registry.register(Histogram(
+    "coinwise_llm_call_duration_seconds", "LLM call latency", ["service", "model"]
+))
+llm_tokens = registry.register(Counter(
+    "coinwise_llm_tokens_total", "Tokens reported by the LLM provider", ["service", "model", "kind"]
+))
+requests_in_flight = registry.register(Gauge(
+    "coinwise_http_requests_in_flight", "Requests currently being served", ["endpoint"]
+))
+request_seconds = registry.register(Histogram(
+    "coinwise_http_request_duration_seconds", "Request latency until the response starts",
+    ["endpoint", "method", "status"]
+))
+
+
+def observe_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+    # Also collected per request for the Server-Timing header
+    if has_request_context() and hasattr(g, "stage_timings"):
+        g.stage_timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def init_app(app):
+    """Request gauges and latency for every endpoint; add ?timing=1 or set
+    METRICS_SERVER_TIMING=1 to get a Server-Timing header with stage timings"""
+    always_time = os.getenv("METRICS_SERVER_TIMING", "").lower() in ("1", "true", "yes", "on")
+
+    @app.before_request
+    def _start_request():
+        g.request_started = time.perf_counter()
+        g.stage_timings = []
+        g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        requests_in_flight.inc(endpoint=g.metrics_endpoint)
+
+    @app.after_request
+    def _record_request(response):
+        elapsed = time.perf_counter() - g.request_started
+        request_seconds.observe(
+            elapsed, endpoint=g.metrics_endpoint, method=request.method, status=response.status_code
+        )
+        if always_time or request.args.get("timing") == "1":
+            timings = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in g.stage_timings]
+            timings.append(f"total;dur={elapsed * 1000:.1f}")
+            response.headers["Server-Timing"] = ", ".join(timings)
+        return response
+
+    @app.teardown_request
+    def _end_request(error=None):
+        # Runs after a streamed body finishes, so streams count as in flight
+        if hasattr(g, "metrics_endpoint"):
+            requests_in_flight.dec(endpoint=g.metrics_endpoint)
@@ -0,0 +1,280 @@
+# services/scheme_catalogue.py
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+RISK_LEVELS = {"low": 0, "medium": 1, "moderate": 1, "high": 2}
+
+# Score weights, out of 10 in total
+RISK_WEIGHT = 4.0
+GOAL_WEIGHT = 3.0
+HORIZON_WEIGHT = 2.0
+TAX_WEIGHT = 1.0
+
+# Incomes above this are assumed to care about tax-saving schemes
+TAX_SAVING_INCOME = 500000
+RETIREMENT_AGE = 60
+
+_STOPWORDS = {"a", "an", "and", "for", "of", "the", "to", "buy", "long", "term"}
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Numeric profile fields and the smallest value each may take
+_NUMERIC_FIELDS = {"age": 0, "income": 0, "investment_horizon": 0, "investment_amount": 0}
+_TRUE_WORDS = {"true", "yes", "1"}
+_FALSE_WORDS = {"false", "no", "0", ""}
+
+
+class ProfileError(ValueError):
+    """Invalid user profile; fields maps each bad field to what is wrong with it"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        super().__init__("Invalid profile: " + "; ".join(f"{name} {problem}" for name, problem in fields.items()))
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = value.replace(",", "").strip()
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    return number
+
+
+def _word_list(value):
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return list(value)
+    raise ValueError
+
+
+def normalize_profile(profile):
+    """Copy of a user profile with its fields coerced to the types rank expects.
+
+    Raises ProfileError naming every field that can't be, so bad input is
+    reported as a client error before any scoring or LLM work.
+    """
+    if not isinstance(profile, dict):
+        raise ProfileError({"profile": "must be a JSON object"})
+    profile = dict(profile)
+    errors = {}
+
+    for name, minimum in _NUMERIC_FIELDS.items():
+        if profile.get(name) is None:
+            continue
+        try:
+            value = _number(profile[name])
+        except (TypeError, ValueError):
+            errors[name] = "must be a number"
+            continue
+        if value < minimum:
+            errors[name] = f"must be at least {minimum}"
+        profile[name] = value
+
+    risk = profile.get("risk_tolerance")
+    if risk is not None:
+        if str(risk).lower() not in RISK_LEVELS:
+            errors["risk_tolerance"] = f"must be one of {', '.join(RISK_LEVELS)}"
+        else:
+            profile["risk_tolerance"] = str(risk).lower()
+
+    for name in ("goals", "preferred_types"):
+        if profile.get(name) is None:
+            continue
+        try:
+            profile[name] = _word_list(profile[name])
+        except ValueError:
+            errors[name] = "must be a string or a list of strings"
+
+    tax_saving = profile.get("tax_saving")
+    if isinstance(tax_saving, str):
+        if tax_saving.strip().lower() in _TRUE_WORDS:
+            profile["tax_saving"] = True
+        elif tax_saving.strip().lower() in _FALSE_WORDS:
+            profile["tax_saving"] = False
+        else:
+            errors["tax_saving"] = "must be true or false"
+
+    if errors:
+        raise ProfileError(errors)
+    return profile
+
+
+def _words(text):
+    return {word for word in re.findall(r'[a-z]+', str(text).lower()) if word not in _STOPWORDS}
+
+
+def _expected_return(returns):
+    """Midpoint of a "7-9% Fixed" / "12-15% CAGR" style range"""
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', str(returns))]
+    return sum(numbers[:2]) / len(numbers[:2]) if numbers else 0.0
+
+
+class SchemeCatalogue:
+    """Investment schemes held as column arrays with lookup indexes.
+
+    Risk and type map to precomputed row masks; lock-in and minimum
+    investment are kept sorted so range filters are a binary search.
+    """
+
+    def __init__(self, schemes):
+        self.schemes = schemes
+        n = len(schemes)
+        self.risk = np.array([RISK_LEVELS.get(str(s.get("risk", "")).lower(), 1) for s in schemes], dtype=int)
+        self.types = np.array([str(s.get("type", "")) for s in schemes], dtype=object)
+        self.lockin = np.array([float(s.get("lockin") or 0) for s in schemes])
+        self.min_investment = np.array([float(s.get("min_investment") or 0) for s in schemes])
+        self.expected_return = np.array([_expected_return(s.get("returns")) for s in schemes])
+        self.tax_benefit = np.array([bool(re.search(r'80C', str(s.get("tax_benefits", "")))) for s in schemes])
+
+        self.by_risk = {level: self.risk == level for level in set(RISK_LEVELS.values())}
+        self.by_type = {name: self.types == name for name in set(self.types)}
+        self._lockin_order = np.argsort(self.lockin, kind="stable")
+        self._investment_order = np.argsort(self.min_investment, kind="stable")
+
+        # Scheme x goal-word incidence matrix for vectorized goal matching
+        self.goal_words = sorted(set().union(*(_words(" ".join(s.get("suitable_for", []))) for s in schemes)) if n else [])
+        word_index = {word: i for i, word in enumerate(self.goal_words)}
+        self.goal_matrix = np.zeros((n, len(self.goal_words)), dtype=float)
+        for row, scheme in enumerate(schemes):
+            for word in _words(" ".join(scheme.get("suitable_for", []))):
+                self.goal_matrix[row, word_index[word]] = 1.0
+        self._word_index = word_index
+        self._by_name = {scheme.get("name"): scheme for scheme in schemes}
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            logging.error(f"Could not find investment schemes file at: {path}")
+            return cls([])
+
+    def __len__(self):
+        return len(self.schemes)
+
+    def candidates(self, max_risk=None, types=None, max_lockin=None, budget=None):
+        """Row mask of schemes passing the hard filters"""
+        mask = np.ones(len(self), dtype=bool)
+        if max_risk is not None:
+            mask &= self._any_of(self.by_risk[level] for level in self.by_risk if level <= max_risk)
+        if types:
+            mask &= self._any_of(self.by_type[name] for name in types if name in self.by_type)
+        if max_lockin is not None:
+            mask &= self._at_most(self._lockin_order, self.lockin, max_lockin)
+        if budget is not None:
+            mask &= self._at_most(self._investment_order, self.min_investment, budget)
+        return mask
+
+    def _any_of(self, masks):
+        combined = np.zeros(len(self), dtype=bool)
+        for mask in masks:
+            combined |= mask
+        return combined
+
+    def _at_most(self, order, values, limit):
+        cut = np.searchsorted(values[order], limit, side="right")
+        mask = np.zeros(len(self), dtype=bool)
+        mask[order[:cut]] = True
+        return mask
+
+    def rank(self, profile, top_k=5):
+        """Deterministically score every scheme against a user profile.
+
+        Returns the top_k schemes as recommendation dicts, best first, with
+        match scores out of 10 and allocations summing to 100.
+        """
+        if not len(self):
+            return []
+
+        profile = normalize_profile(profile)
+        user_risk = RISK_LEVELS.get(str(profile.get("risk_tolerance", "medium")).lower(), 1)
+        age = float(profile.get("age") or 30)
+        income = float(profile.get("income") or 0)
+        horizon = float(profile.get("investment_horizon") or max(1, RETIREMENT_AGE - age))
+        budget = profile.get("investment_amount")
+        tax_saving = profile.get("tax_saving")
+        wants_tax_saving = bool(tax_saving) if tax_saving is not None else income > TAX_SAVING_INCOME
+
+        mask = self.candidates(
+            types=profile.get("preferred_types"),
+            budget=float(budget) if budget is not None else None
+        )
+
+        risk_fit = 1 - np.abs(self.risk - user_risk) / 2
+        goals = np.zeros(len(self.goal_words))
+        for word in _words(" ".join(profile.get("goals") or [])):
+            if word in self._word_index:
+                goals[self._word_index[word]] = 1.0
+        goal_hits = self.goal_matrix @ goals
+        goal_fit = np.minimum(goal_hits, 2) / 2 if goals.any() else np.full(len(self), 0.5)
+        # Lock-ins past the horizon lose credit in proportion to the overrun
+        horizon_fit = np.clip(1 - np.maximum(self.lockin - horizon, 0) / max(horizon, 1), 0, 1)
+        tax_fit = self.tax_benefit.astype(float) if wants_tax_saving else np.full(len(self), 0.5)
+
+        scores = RISK_WEIGHT * risk_fit + GOAL_WEIGHT * goal_fit + HORIZON_WEIGHT * horizon_fit + TAX_WEIGHT * tax_fit
+        scores = np.where(mask, scores, -np.inf)
+
+        k = min(top_k, int(mask.sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((-self.expected_return[top], -scores[top]))]
+
+        allocations = self._allocations(scores[top])
+        recommendations = []
+        for row, allocation in zip(top, allocations):
+            reasons = []
+            if risk_fit[row] == 1:
+                reasons.append(f"{self.schemes[row].get('risk')} risk matches your risk tolerance")
+            if goal_hits[row]:
+                reasons.append(f"Suited to {', '.join(self.schemes[row].get('suitable_for', []))}")
+            if horizon_fit[row] == 1:
+                reasons.append(f"{self.lockin[row]:g}-year lock-in fits your {horizon:g}-year horizon")
+            if wants_tax_saving and self.tax_benefit[row]:
+                reasons.append(f"Tax benefit: {self.schemes[row].get('tax_benefits')}")
+            recommendations.append({
+                "scheme": self.schemes[row].get("name"),
+                "match_score": f"{round(float(scores[row]))}/10",
+                "score": round(float(scores[row]), 2),
+                "reasons": reasons,
+                "suggested_allocation": allocation
+            })
+        return recommendations
+
+    @staticmethod
+    def _allocations(scores):
+        """Split 100% in proportion to score, in whole percent"""
+        total = scores.sum()
+        shares = scores / total * 100 if total > 0 else np.full(len(scores), 100 / len(scores))
+        allocations = np.floor(shares).astype(int)
+        remainder = 100 - allocations.sum()
+        allocations[np.argsort(allocations - shares)[:remainder]] += 1
+        return allocations.tolist()
+
+    def compact(self, names):
+        """Catalogue entries for the named schemes, for prompting"""
+        return [self._by_name[name] for name in names if name in self._by_name]
+
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_scheme_catalogue():
+    global _catalogue
+    with _catalogue_lock:
+        if _catalogue is None:
+            path = os.getenv("INVESTMENT_SCHEMES_PATH", os.path.join(_BACKEND_DIR, 'data', 'investment_schemes.json'))
+            _catalogue = SchemeCatalogue.from_file(path)
+        return _catalogue
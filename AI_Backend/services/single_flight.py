@@ -0,0 +1,132 @@
+# services/single_flight.py
+from concurrent.futures import Future
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+
+from services.metrics import registry, Counter
+
+singleflight_requests = registry.register(Counter(
+    "coinwise_singleflight_requests_total",
+    "Calls that ran the computation (leader) or joined one already in flight (coalesced)",
+    ["operation", "role"]
+))
+
+
+def content_key(*parts):
+    """sha256 over raw bytes, or over canonical JSON for anything else"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray)):
+            data = bytes(part)
+        else:
+            data = json.dumps(part, sort_keys=True, separators=(",", ":"), default=str).encode()
+        # Length-prefixed so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class _Flight:
+    __slots__ = ("future", "task", "waiters")
+
+    def __init__(self):
+        self.future = Future()
+        self.task = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one computation.
+
+    The first caller runs it; callers arriving while it is in flight wait
+    for that result (a deep copy, so nobody shares mutable state) instead of
+    starting their own. Nothing is cached: once the computation finishes the
+    next call runs it again. Sync callers (threads) and async callers (the
+    shared event loop) join the same flights.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        flight, leader = self._join(key)
+        try:
+            if not leader:
+                return copy.deepcopy(flight.future.result())
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                self._finish(key, flight, exception=e)
+                raise
+            self._finish(key, flight, result=result)
+            return result
+        finally:
+            self._leave(flight)
+
+    async def ado(self, key, factory):
+        """Await factory() once per key; factory returns a fresh coroutine.
+
+        The computation runs as its own task, so a leader that times out
+        doesn't take its followers down with it; it is cancelled only once
+        every async waiter has gone.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            flight.task = asyncio.ensure_future(factory())
+            flight.task.add_done_callback(lambda task: self._finish_task(key, flight, task))
+        try:
+            result = await asyncio.shield(asyncio.wrap_future(flight.future))
+        except asyncio.CancelledError:
+            if self._leave(flight) == 0 and flight.task is not None:
+                flight.task.cancel()
+            raise
+        except BaseException:
+            self._leave(flight)
+            raise
+        self._leave(flight)
+        return result if leader else copy.deepcopy(result)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def _join(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            flight.waiters += 1
+        singleflight_requests.inc(operation=self.name, role="leader" if leader else "coalesced")
+        return flight, leader
+
+    def _leave(self, flight):
+        with self._lock:
+            flight.waiters -= 1
+            return flight.waiters
+
+    def _finish(self, key, flight, result=None, exception=None):
+        # Unregister first: a call arriving after this starts a fresh flight
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if exception is not None:
+            flight.future.set_exception(exception)
+        else:
+            flight.future.set_result(result)
+
+    def _finish_task(self, key, flight, task):
+        if task.cancelled():
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.future.cancel()
+        elif task.exception() is not None:
+            self._finish(key, flight, exception=task.exception())
+        else:
+            self._finish(key, flight, result=task.result())
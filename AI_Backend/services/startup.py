@@ -0,0 +1,124 @@
+# services/startup.py
+import importlib
+import logging
+import os
+import threading
+import time
+
+# Imported first by app.py, so this approximates when the process began loading the app
+_IMPORTED_AT = time.perf_counter()
+
+_lock = threading.Lock()
+_lazy_modules = {}
+_report = {
+    "phases": {},
+    "warmup": {"mode": "off", "state": "pending", "seconds": None, "tasks": {}},
+    "first_request_seconds": None
+}
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access.
+
+    Route modules hold these instead of importing services directly, so
+    pandas, sklearn, langchain and PyPDF2 load with the first request that
+    needs them, or during warm-up, rather than when the app is imported.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._load_seconds = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            with _lock:
+                if self._module is None:
+                    self._load_seconds = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name):
+    with _lock:
+        if name not in _lazy_modules:
+            _lazy_modules[name] = LazyModule(name)
+        return _lazy_modules[name]
+
+
+def record_phase(name, seconds):
+    with _lock:
+        _report["phases"][name] = round(seconds, 4)
+
+
+def record_first_request():
+    with _lock:
+        if _report["first_request_seconds"] is None:
+            _report["first_request_seconds"] = round(time.perf_counter() - _IMPORTED_AT, 4)
+
+
+def since_import():
+    return time.perf_counter() - _IMPORTED_AT
+
+
+def warmup_mode(mode=None):
+    """STARTUP_WARMUP=off (default), sync (before serving) or background"""
+    mode = (mode or os.getenv("STARTUP_WARMUP", "off")).strip().lower()
+    return mode if mode in ("off", "sync", "background") else "off"
+
+
+def warm_up(tasks, mode="sync"):
+    """Import every lazy module, then run each (name, fn) task once.
+
+    A failed task is logged and reported; the rest still run, and whatever
+    it was meant to preload is built on first use instead.
+    """
+    def run():
+        start = time.perf_counter()
+        for module in list(_lazy_modules.values()):
+            try:
+                module._load()
+            except Exception as e:
+                logging.error(f"Warm-up import of {module._name} failed: {str(e)}")
+        for name, fn in tasks:
+            task_start = time.perf_counter()
+            try:
+                fn()
+                result = round(time.perf_counter() - task_start, 4)
+            except Exception as e:
+                logging.error(f"Warm-up task {name} failed: {str(e)}")
+                result = f"error: {str(e)}"
+            with _lock:
+                _report["warmup"]["tasks"][name] = result
+        with _lock:
+            _report["warmup"].update(state="done", seconds=round(time.perf_counter() - start, 4))
+        logging.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+    with _lock:
+        _report["warmup"].update(mode=mode, state="running")
+    if mode == "background":
+        threading.Thread(target=run, name="startup-warmup", daemon=True).start()
+    else:
+        run()
+
+
+def startup_report():
+    with _lock:
+        report = {
+            "phases": dict(_report["phases"]),
+            "warmup": {**_report["warmup"], "tasks": dict(_report["warmup"]["tasks"])},
+            "first_request_seconds": _report["first_request_seconds"],
+            "lazy_modules": {
+                name: {
+                    "loaded": module._module is not None,
+                    "load_seconds": None if module._load_seconds is None else round(module._load_seconds, 4)
+                }
+                for name, module in _lazy_modules.items()
+            }
+        }
+    return report
@@ -0,0 +1,209 @@
+# services/statement_extractor.py
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from PyPDF2 import PdfReader
+import ast
+import json
+import logging
+import os
+import re
+import threading
+
+# A transaction row starts with a date: 01/05/2024, 2024-05-01, 01-May-24, 01 May 2024 ...
+_RECORD_START_RE = re.compile(
+    r'^\s*(?:\d{1,4}[/.-]\d{1,2}[/.-]\d{2,4}'
+    r'|\d{1,2}[\s-](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[\s,-]*\d{2,4})',
+    re.IGNORECASE
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Worker pool shared across uploads so processes are only forked once"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1)))
+        return _pool
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    reader = PdfReader(BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_pages(pdf_bytes):
+    """Return the text of every page, extracting page ranges in parallel"""
+    page_count = len(PdfReader(BytesIO(pdf_bytes)).pages)
+    workers = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+
+    if workers <= 1 or page_count < int(os.getenv("PDF_PARALLEL_MIN_PAGES", 8)):
+        return _extract_page_range(pdf_bytes, 0, page_count)
+
+    # One contiguous range per worker so each parses the document only once
+    step = -(-page_count // workers)
+    futures = [
+        _get_pool().submit(_extract_page_range, pdf_bytes, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def is_record_start(line):
+    return bool(_RECORD_START_RE.match(line))
+
+
+def split_records(text):
+    """Group lines into records, each starting at a dated line"""
+    records = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if is_record_start(line) or not records:
+            records.append(line)
+        else:
+            records[-1] += "\n" + line
+    return records
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def pack_chunks(pages, max_tokens=None, overlap=None):
+    """Pack page records into token-bounded chunks without splitting a record.
+
+    Each chunk repeats the last `overlap` records of the previous one so a row
+    cut off at a chunk edge is still seen whole; merge_chunk_results drops the
+    resulting duplicates.
+    """
+    max_tokens = int(max_tokens or os.getenv("EXTRACTION_CHUNK_TOKENS", 3000))
+    overlap = int(overlap if overlap is not None else os.getenv("EXTRACTION_OVERLAP_RECORDS", 2))
+
+    records = []
+    for page in pages:
+        records.extend(split_records(page))
+
+    chunks = []
+    current, current_tokens, carried = [], 0, 0
+    for record in records:
+        tokens = estimate_tokens(record)
+        if current_tokens + tokens > max_tokens and len(current) > carried:
+            chunks.append({"text": "\n".join(current), "overlap": carried})
+            current = current[-overlap:] if overlap else []
+            carried = len(current)
+            current_tokens = sum(estimate_tokens(r) for r in current)
+        current.append(record)
+        current_tokens += tokens
+
+    if len(current) > carried or not chunks:
+        chunks.append({"text": "\n".join(current), "overlap": carried})
+    return chunks
+
+
+def parse_json_array(raw):
+    """Pull the JSON array out of an LLM response"""
+    json_match = re.search(r'\[.*\]', raw, re.DOTALL)
+    if not json_match:
+        raise ValueError("No valid transactions found in response")
+    try:
+        return json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        # Models sometimes answer with Python-style quotes
+        return ast.literal_eval(json_match.group(0))
+
+
+def extract_transactions(chunks, llm, prompt):
+    """Run the extraction prompt over every chunk concurrently and merge"""
+    return merge_chunk_results(chunks, extract_chunks(chunks, llm, prompt))
+
+
+def extract_chunks(chunks, llm, prompt):
+    """Raw rows per chunk, for callers that merge chunk groups separately"""
+    chain = prompt | llm
+    inputs = [{"text": chunk["text"]} for chunk in chunks]
+    responses = chain.batch(
+        inputs,
+        config={"max_concurrency": int(os.getenv("EXTRACTION_CONCURRENCY", 4))},
+        return_exceptions=True
+    )
+
+    results = []
+    for chunk_input, response in zip(inputs, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            results.append(parse_json_array(response.content))
+        except Exception as e:
+            # One retry per failed chunk before giving up on the statement
+            logging.error(f"Chunk extraction failed, retrying: {str(e)}")
+            results.append(parse_json_array(chain.invoke(chunk_input).content))
+
+    return results
+
+
+async def aextract_transactions(chunks, llm, prompt):
+    """extract_transactions with the chunk calls made on the event loop"""
+    return merge_chunk_results(chunks, await aextract_chunks(chunks, llm, prompt))
+
+
+async def aextract_chunks(chunks, llm, prompt):
+    chain = prompt | llm
+    inputs = [{"text": chunk["text"]} for chunk in chunks]
+    responses = await chain.abatch(
+        inputs,
+        config={"max_concurrency": int(os.getenv("EXTRACTION_CONCURRENCY", 4))},
+        return_exceptions=True
+    )
+
+    results = []
+    for chunk_input, response in zip(inputs, responses):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            results.append(parse_json_array(response.content))
+        except Exception as e:
+            logging.error(f"Chunk extraction failed, retrying: {str(e)}")
+            results.append(parse_json_array((await chain.ainvoke(chunk_input)).content))
+
+    return results
+
+
+def _dedup_key(txn):
+    try:
+        amount = round(float(txn.get("amount", 0)), 2)
+    except (TypeError, ValueError):
+        amount = txn.get("amount")
+    description = " ".join(str(txn.get("description", "")).lower().split())
+    return (txn.get("date"), description, amount, txn.get("type"))
+
+
+def merge_chunk_results(chunks, results):
+    """Concatenate chunk outputs, dropping rows repeated from the overlap.
+
+    Only the leading rows of a chunk (as many as it carried over) are checked,
+    and only against the tail of the previous chunk, so genuine duplicate
+    transactions elsewhere in the statement are kept.
+    """
+    merged = []
+    previous = []
+    for chunk, transactions in zip(chunks, results):
+        window = chunk["overlap"]
+        tail = {}
+        for txn in previous[-window:] if window else []:
+            key = _dedup_key(txn)
+            tail[key] = tail.get(key, 0) + 1
+
+        for i, txn in enumerate(transactions):
+            key = _dedup_key(txn)
+            if i < window and tail.get(key):
+                tail[key] -= 1
+                continue
+            merged.append(txn)
+        previous = transactions
+    return merged
@@ -0,0 +1,229 @@
+# services/statement_parsers.py
+from datetime import datetime
+import abc
+import re
+
+from services.statement_extractor import split_records, is_record_start
+
+_DATE = r'(?:\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}|\d{4}-\d{2}-\d{2}|\d{1,2}[\s-][A-Za-z]{3}[\s-]\d{2,4})'
+# Amounts always carry paise so reference numbers are never mistaken for them
+_AMOUNT = r'\d{1,3}(?:,\d{2,3})*\.\d{2}|\d+\.\d{2}'
+
+_DATE_FORMATS = [
+    "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%d-%m-%y", "%d.%m.%Y", "%d.%m.%y",
+    "%Y-%m-%d", "%d-%b-%Y", "%d-%b-%y", "%d %b %Y", "%d %b %y"
+]
+_OPENING_BALANCE_RE = re.compile(
+    rf'(?:opening\s+balance|balance\s+b/?f|brought\s+forward)\D{{0,20}}?({_AMOUNT})',
+    re.IGNORECASE
+)
+_SUMMARY_LINE_RE = re.compile(
+    r'opening\s+balance|closing\s+balance|balance\s+b/?f|brought\s+forward|carried\s+forward',
+    re.IGNORECASE
+)
+_TRAILING_DATE_RE = re.compile(rf'\s+{_DATE}$')
+# Page furniture below the last row: where its wrapped narration stops
+_FOOTER_LINE_RE = re.compile(
+    r'\bpage\s+\d+|\b\d+\s+of\s+\d+\b|computer[\s-]+generated|end\s+of\s+statement|continued',
+    re.IGNORECASE
+)
+
+BALANCE_TOLERANCE = 0.01
+
+_parsers = []
+
+
+def register_parser(parser_cls):
+    """Add a layout parser to the registry, tried in registration order"""
+    _parsers.append(parser_cls())
+    return parser_cls
+
+
+def _to_amount(value):
+    if value is None or value.strip() in ("", "-"):
+        return 0.0
+    return float(value.replace(",", ""))
+
+
+def _before_footer(lines):
+    kept = []
+    for line in lines:
+        if _FOOTER_LINE_RE.search(line) or _SUMMARY_LINE_RE.search(line):
+            break
+        kept.append(line)
+    return kept
+
+
+def _to_iso_date(value):
+    value = " ".join(value.split())
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+class LayoutParser(abc.ABC):
+    """Parses one column layout; subclasses supply row_re and _direction()"""
+    name = "base"
+    row_re = None
+
+    def parse_page(self, text, opening_balance=None):
+        """Return (transactions, closing balance) or None if the page doesn't verify"""
+        rows = []
+        for record in split_records(text):
+            lines = record.split("\n")
+            match = self.row_re.match(lines[0].strip())
+            if match:
+                rows.append((match, lines[1:]))
+            elif is_record_start(lines[0]) and not _SUMMARY_LINE_RE.search(lines[0]):
+                # A dated line this layout can't read means the page isn't ours
+                return None
+
+        if not rows:
+            return None
+
+        transactions = []
+        balance = opening_balance
+        for match, continuation in rows:
+            date = _to_iso_date(match.group("date"))
+            if not date:
+                return None
+
+            amount, txn_type = self._direction(match, balance)
+            new_balance = _to_amount(match.group("balance"))
+            if txn_type is None or amount <= 0:
+                return None
+
+            # Running-balance check: every row must reconcile with the last one
+            if balance is not None:
+                expected = balance + amount if txn_type == "income" else balance - amount
+                if abs(expected - new_balance) > BALANCE_TOLERANCE:
+                    return None
+            balance = new_balance
+
+            description = _TRAILING_DATE_RE.sub("", match.group("narration").strip())
+            # Wrapped narration lines belong to the row; after the page's last
+            # row they run until the footer starts
+            if match is rows[-1][0]:
+                continuation = _before_footer(continuation)
+            if continuation:
+                description = " ".join([description, *[line.strip() for line in continuation]])
+
+            transactions.append({
+                "date": date,
+                "description": description,
+                "amount": amount,
+                "type": txn_type
+            })
+
+        return transactions, balance
+
+    @abc.abstractmethod
+    def _direction(self, match, previous_balance):
+        """(amount, "income" | "expense" | None) for one matched row"""
+
+
+@register_parser
+class DebitCreditBalanceParser(LayoutParser):
+    """Date | Narration | Debit | Credit | Balance with '-' or 0.00 for the empty side"""
+    name = "debit_credit_balance"
+    row_re = re.compile(
+        rf'^(?P<date>{_DATE})\s+(?P<narration>.+?)\s+(?P<debit>{_AMOUNT}|-)\s+'
+        rf'(?P<credit>{_AMOUNT}|-)\s+(?P<balance>{_AMOUNT})(?:\s*(?:Cr|CR))?$'
+    )
+
+    def _direction(self, match, previous_balance):
+        debit, credit = _to_amount(match.group("debit")), _to_amount(match.group("credit"))
+        if debit and not credit:
+            return debit, "expense"
+        if credit and not debit:
+            return credit, "income"
+        return 0.0, None
+
+
+@register_parser
+class DrCrMarkerParser(LayoutParser):
+    """Date | Narration | Amount Dr/Cr | Balance"""
+    name = "dr_cr_marker"
+    row_re = re.compile(
+        rf'^(?P<date>{_DATE})\s+(?P<narration>.+?)\s+(?P<amount>{_AMOUNT})\s*(?P<marker>Dr|DR|Cr|CR)\.?\s+'
+        rf'(?P<balance>{_AMOUNT})(?:\s*(?:Dr|DR|Cr|CR))?$'
+    )
+
+    def _direction(self, match, previous_balance):
+        amount = _to_amount(match.group("amount"))
+        return amount, "expense" if match.group("marker").lower() == "dr" else "income"
+
+
+@register_parser
+class AmountBalanceParser(LayoutParser):
+    """Date | Narration | Withdrawal or Deposit | Balance, where the empty
+    column vanishes in extracted text and the side is read off the balance"""
+    name = "amount_balance"
+    row_re = re.compile(
+        rf'^(?P<date>{_DATE})\s+(?P<narration>.+?)\s+(?P<amount>{_AMOUNT})\s+'
+        rf'(?P<balance>{_AMOUNT})(?:\s*(?:Cr|CR))?$'
+    )
+
+    def _direction(self, match, previous_balance):
+        amount = _to_amount(match.group("amount"))
+        if previous_balance is None:
+            return amount, None
+        balance = _to_amount(match.group("balance"))
+        if abs(previous_balance + amount - balance) <= BALANCE_TOLERANCE:
+            return amount, "income"
+        if abs(previous_balance - amount - balance) <= BALANCE_TOLERANCE:
+            return amount, "expense"
+        return amount, None
+
+
+def parse_segments(pages):
+    """Run the layout parsers over each page.
+
+    Returns the statement in page order as segments: ("parsed", transactions)
+    for a run of pages a layout parser read and ("unparsed", page texts) for
+    a run left to the LLM. The closing balance of a parsed page seeds the
+    running-balance check on the next one.
+    """
+    segments = []
+    balance = None
+    last_parser = None
+
+    for text in pages:
+        opening = _OPENING_BALANCE_RE.search(text)
+        if opening:
+            balance = _to_amount(opening.group(1))
+
+        # The layout that matched the previous page is the most likely match
+        candidates = [last_parser] + [p for p in _parsers if p is not last_parser] if last_parser else _parsers
+        result = None
+        for parser in candidates:
+            result = parser.parse_page(text, balance)
+            if result:
+                last_parser = parser
+                break
+
+        if result:
+            page_transactions, balance = result
+            kind, items = "parsed", page_transactions
+        else:
+            kind, items = "unparsed", [text]
+            balance = None
+
+        if segments and segments[-1][0] == kind:
+            segments[-1][1].extend(items)
+        else:
+            segments.append((kind, list(items)))
+
+    return segments
+
+
+def parse_statement(pages):
+    """(transactions from known layouts, unparsed page texts)"""
+    transactions = []
+    unparsed = []
+    for kind, items in parse_segments(pages):
+        (transactions if kind == "parsed" else unparsed).extend(items)
+    return transactions, unparsed
@@ -0,0 +1,271 @@
+# services/statement_pipeline.py
+import asyncio
+import threading
+import time
+
+from langchain_core.prompts import PromptTemplate
+
+from services import metrics
+from services.categorization_cache import get_categorization_cache
+from services.llm import create_llm
+from services.single_flight import SingleFlight, content_key
+from services.statement_extractor import (
+    extract_pages, pack_chunks, extract_chunks, aextract_chunks, merge_chunk_results
+)
+from services.statement_parsers import parse_segments
+from services.transaction_categorizer import TransactionCategorizer
+
+# Transaction Extraction Template
+extraction_template = """
+Analyze the following bank statement text and extract all transactions with:
+- Date (YYYY-MM-DD format)
+- Description
+- Amount (numeric value only)
+- Type (income/expense)
+
+Format the output as a JSON array. Example:
+[
+  {{
+    "date": "2024-05-01",
+    "description": "Salary Credit",
+    "amount": 75000,
+    "type": "income"
+  }}
+]
+
+Statement Text:
+{text}
+"""
+
+extraction_prompt = PromptTemplate.from_template(extraction_template)
+
+# Categorization Template
+categories = [
+    "Food", "Transport", "Housing", "Utilities",
+    "Entertainment", "Healthcare", "Education", "Other"
+]
+
+categorization_template = """
+Categorize this transaction into one of these categories: {categories}
+
+Transaction Details:
+- Date: {date}
+- Description: {description}
+- Amount: {amount}
+- Type: {type}
+
+Respond only with the category name. Do not include any other text.
+"""
+
+categorization_prompt = PromptTemplate.from_template(categorization_template)
+
+_llm = None
+_llm_lock = threading.Lock()
+
+# Retried uploads of the same PDF share one pipeline run
+_flights = SingleFlight("process_pdf")
+
+
+def get_statement_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = create_llm("statement", temperature=1)
+        return _llm
+
+def _no_progress(stage, **counts):
+    pass
+
+def parse_locally(pdf_bytes, report=_no_progress):
+    """Statement segments in page order; see parse_segments"""
+    # Extract page text in parallel
+    with metrics.timed("pdf_parse"):
+        pages = extract_pages(pdf_bytes)
+    report("pages_parsed", pages=len(pages))
+
+    # Known table layouts are parsed locally; only the rest go to the LLM
+    with metrics.timed("layout_parse"):
+        return parse_segments(pages)
+
+def _llm_chunks(segments):
+    """(segment index, chunks) for each run of pages left to the LLM"""
+    return [(i, pack_chunks(pages)) for i, (kind, pages) in enumerate(segments) if kind == "unparsed"]
+
+def _splice(segments, gaps, results):
+    """Transactions in statement order, each LLM run's rows put back where its pages were"""
+    extracted = {}
+    offset = 0
+    for index, chunks in gaps:
+        # Chunks only overlap within a run, so each run is merged on its own
+        extracted[index] = merge_chunk_results(chunks, results[offset:offset + len(chunks)])
+        offset += len(chunks)
+
+    transactions = []
+    for i, (kind, items) in enumerate(segments):
+        transactions.extend(extracted[i] if kind == "unparsed" else items)
+    return transactions
+
+def _llm_page_count(segments):
+    return sum(len(items) for kind, items in segments if kind == "unparsed")
+
+def extract_statement(file, report=_no_progress):
+    """Turn the uploaded PDF into uncategorized transactions"""
+    pdf_bytes = file if isinstance(file, bytes) else file.read()
+    segments = parse_locally(pdf_bytes, report)
+    gaps, results = [], []
+    if _llm_page_count(segments):
+        with metrics.timed("llm_extraction"):
+            gaps = _llm_chunks(segments)
+            results = extract_chunks([c for _, chunks in gaps for c in chunks], get_statement_llm(), extraction_prompt)
+    transactions = _splice(segments, gaps, results)
+    report("transactions_extracted", transactions=len(transactions), llm_pages=_llm_page_count(segments))
+    return transactions
+
+def iter_categorized(transactions, report=_no_progress):
+    """Yield (row, transaction) as soon as each one has its category"""
+    # Categorize transactions in batches, skipping payees seen before
+    categorizer = TransactionCategorizer(
+        get_statement_llm(), categories, categorization_prompt, cache=get_categorization_cache()
+    )
+    categorized = 0
+    # Only time spent producing categories counts; the consumer's time between rows doesn't
+    elapsed = 0.0
+    batches = categorizer.categorize_batches(transactions)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                index, category = next(batches)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+            transactions[index]["category"] = category
+            categorized += 1
+            if categorized % categorizer.batch_size == 0:
+                report("categorized", transactions=categorized, total=len(transactions))
+            yield index, transactions[index]
+    finally:
+        metrics.observe_stage("categorization", elapsed)
+    report("categorized", transactions=categorized, total=len(transactions))
+
+def process_pdf(file, progress=None):
+    # progress(stage, **counts) is called as each stage completes; a call
+    # that joins a run already in flight for the same bytes gets no reports
+    pdf_bytes = file if isinstance(file, bytes) else file.read()
+    return _flights.do(content_key(pdf_bytes), _process_pdf, pdf_bytes, progress or _no_progress)
+
+def _process_pdf(pdf_bytes, report):
+    try:
+        transactions = extract_statement(pdf_bytes, report)
+        for _ in iter_categorized(transactions, report):
+            pass
+
+        # Calculate financial analysis
+        with metrics.timed("analysis"):
+            analysis = calculate_analysis(transactions)
+
+        return {
+            "transactions": transactions,
+            "analysis": analysis
+        }
+
+    except Exception as e:
+        raise RuntimeError(f"PDF processing failed: {str(e)}")
+
+async def aprocess_pdf(pdf_bytes):
+    """process_pdf with its LLM calls made on the event loop; PDF parsing
+    runs in a worker thread so the loop stays free"""
+    return await _flights.ado(content_key(pdf_bytes), lambda: _aprocess_pdf(pdf_bytes))
+
+async def _aprocess_pdf(pdf_bytes):
+    try:
+        segments = await asyncio.to_thread(parse_locally, pdf_bytes)
+        gaps, results = [], []
+        if _llm_page_count(segments):
+            with metrics.timed("llm_extraction"):
+                gaps = _llm_chunks(segments)
+                results = await aextract_chunks(
+                    [c for _, chunks in gaps for c in chunks], get_statement_llm(), extraction_prompt
+                )
+        transactions = _splice(segments, gaps, results)
+
+        categorizer = TransactionCategorizer(
+            get_statement_llm(), categories, categorization_prompt, cache=get_categorization_cache()
+        )
+        with metrics.timed("categorization"):
+            await categorizer.acategorize(transactions)
+
+        with metrics.timed("analysis"):
+            analysis = calculate_analysis(transactions)
+
+        return {
+            "transactions": transactions,
+            "analysis": analysis
+        }
+
+    except Exception as e:
+        raise RuntimeError(f"PDF processing failed: {str(e)}")
+
+def new_analysis():
+    return {
+        "total_income": 0,
+        "total_expenses": 0,
+        "categories": {},
+        "expense_to_income_ratio": 0,
+        "category_percentages": {}
+    }
+
+def add_to_analysis(analysis, txn):
+    amount = float(txn["amount"])
+    if txn["type"] == "income":
+        analysis["total_income"] += amount
+    else:
+        analysis["total_expenses"] += amount
+        category = txn["category"]
+        analysis["categories"][category] = analysis["categories"].get(category, 0) + amount
+
+def finish_analysis(analysis):
+    if analysis["total_income"] > 0:
+        analysis["expense_to_income_ratio"] = round(
+            (analysis["total_expenses"] / analysis["total_income"]) * 100, 2
+        )
+
+        for category, amount in analysis["categories"].items():
+            analysis["category_percentages"][category] = round(
+                (amount / analysis["total_income"]) * 100, 2
+            )
+
+    return analysis
+
+def calculate_analysis(transactions):
+    analysis = new_analysis()
+    for txn in transactions:
+        add_to_analysis(analysis, txn)
+    return finish_analysis(analysis)
+
+def iter_statement_events(pdf_bytes):
+    """Transaction records as they are categorized, then one analysis record"""
+    try:
+        transactions = extract_statement(pdf_bytes)
+        yield {"event": "extracted", "transaction_count": len(transactions)}
+
+        analysis = new_analysis()
+        for row, txn in iter_categorized(transactions):
+            add_to_analysis(analysis, txn)
+            yield {"event": "transaction", "row": row, "transaction": txn}
+
+        yield {"event": "analysis", "financial_analysis": finish_analysis(analysis)}
+    except Exception as e:
+        yield {"event": "error", "error": f"PDF processing failed: {str(e)}"}
+
+def statement_response(result):
+    return {
+        "success": True,
+        "transaction_count": len(result["transactions"]),
+        "transactions": result["transactions"],
+        "financial_analysis": result["analysis"]
+    }
+
+def run_statement_job(pdf_bytes, progress):
+    return statement_response(process_pdf(pdf_bytes, progress=progress))
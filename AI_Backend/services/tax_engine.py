@@ -0,0 +1,170 @@
+# services/tax_engine.py
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COUNTRY = "INDIA"
+DEFAULT_FY = os.getenv("TAX_DEFAULT_FY", "FY2024")
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlabTable:
+    """One regime's slabs with the tax due at each slab's lower bound precomputed,
+    so the liability for any income is one lookup plus one multiply."""
+
+    def __init__(self, config):
+        slabs = sorted(config["slabs"], key=lambda slab: slab["min"])
+        self.slabs = slabs
+        self.lower = np.array([slab["min"] for slab in slabs], dtype=float)
+        self.rates = np.array([slab["rate"] for slab in slabs], dtype=float) / 100
+        self.cumulative = np.concatenate(([0.0], np.cumsum(np.diff(self.lower) * self.rates[:-1])))
+        self.standard_deduction = float(config.get("standard_deduction", 0))
+        rebate = config.get("rebate") or {}
+        self.rebate_income = float(rebate.get("max_income", 0))
+        self.max_rebate = float(rebate.get("max_rebate", 0))
+        self.cess = float(config.get("cess", 0)) / 100
+        # Sections this regime allows, with their caps; anything else is ignored
+        self.deduction_limits = config.get("deduction_limits", {})
+
+    def allowed_deductions(self, deductions, size):
+        """Sum of capped deductions per row from {section: amounts}"""
+        total = np.zeros(size)
+        for section, limit in self.deduction_limits.items():
+            if section in deductions:
+                amounts = np.nan_to_num(np.asarray(deductions[section], dtype=float))
+                total += np.clip(amounts, 0, limit)
+        return total
+
+    def compute(self, incomes, deductions=None):
+        """Liabilities for an array of gross incomes"""
+        incomes = np.asarray(incomes, dtype=float)
+        allowed = self.allowed_deductions(deductions or {}, len(incomes))
+        taxable = np.maximum(incomes - self.standard_deduction - allowed, 0)
+
+        slab = np.searchsorted(self.lower, taxable, side="right") - 1
+        slab_tax = self.cumulative[slab] + (taxable - self.lower[slab]) * self.rates[slab]
+        rebate = np.where(taxable <= self.rebate_income, np.minimum(slab_tax, self.max_rebate), 0.0)
+        cess = (slab_tax - rebate) * self.cess
+        return {
+            "deductions_allowed": allowed,
+            "taxable_income": taxable,
+            "slab_tax": slab_tax,
+            "rebate": rebate,
+            "cess": cess,
+            "total_tax": np.round(slab_tax - rebate + cess)
+        }
+
+
+class TaxEngine:
+    def __init__(self, data):
+        self.data = data
+        self.tables = {
+            (country, fy, regime): SlabTable(config)
+            for country, years in data.items()
+            for fy, year in years.items()
+            for regime, config in year["regimes"].items()
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            logging.error(f"Could not find tax slab file at: {path}")
+            return cls({})
+
+    def regimes(self, country=DEFAULT_COUNTRY, fy=DEFAULT_FY):
+        try:
+            return list(self.data[country][fy]["regimes"])
+        except KeyError:
+            raise ValueError(f"No tax slabs for {country} {fy}")
+
+    def table(self, country=DEFAULT_COUNTRY, fy=DEFAULT_FY, regime=None):
+        regime = regime or self.data.get(country, {}).get(fy, {}).get("default_regime", "new")
+        try:
+            return self.tables[(country, fy, regime)]
+        except KeyError:
+            raise ValueError(f"No {regime} regime slabs for {country} {fy}")
+
+    def compute(self, incomes, deductions=None, country=DEFAULT_COUNTRY, fy=DEFAULT_FY, regime=None):
+        return self.table(country, fy, regime).compute(incomes, deductions)
+
+    def simulate(self, scenarios):
+        """Evaluate every scenario under every regime of its FY.
+
+        Each scenario is {"income", "deductions": {section: amount}, "fy",
+        "country", "id"}; only income is required. Scenarios are grouped by
+        country and FY so each regime is computed once per group over arrays.
+        """
+        if not scenarios:
+            return []
+
+        frame = pd.DataFrame({
+            "income": [scenario.get("income", 0) for scenario in scenarios],
+            "country": [scenario.get("country") or DEFAULT_COUNTRY for scenario in scenarios],
+            "fy": [scenario.get("fy") or DEFAULT_FY for scenario in scenarios]
+        })
+        frame["income"] = pd.to_numeric(frame["income"], errors="coerce").fillna(0.0)
+        sections = pd.DataFrame([
+            scenario.get("deductions") if isinstance(scenario.get("deductions"), dict) else {}
+            for scenario in scenarios
+        ], index=frame.index).apply(
+            pd.to_numeric, errors="coerce"
+        ).fillna(0.0)
+
+        results = [None] * len(scenarios)
+        for (country, fy), rows in frame.groupby(["country", "fy"]).indices.items():
+            try:
+                regimes = self.regimes(country, fy)
+            except ValueError as e:
+                for row in rows:
+                    results[row] = {"index": int(row), "error": str(e)}
+                continue
+
+            incomes = frame["income"].to_numpy()[rows]
+            deductions = {section: sections[section].to_numpy()[rows] for section in sections.columns}
+            computed = {regime: self.compute(incomes, deductions, country, fy, regime) for regime in regimes}
+            totals = np.vstack([computed[regime]["total_tax"] for regime in regimes])
+            best = totals.argmin(axis=0)
+            savings = (totals.max(axis=0) - totals.min(axis=0)).round(2).tolist()
+            # Convert to Python lists once per column instead of once per cell
+            columns = {
+                regime: {key: values.round(2).tolist() for key, values in computed[regime].items()}
+                for regime in regimes
+            }
+
+            for i, row in enumerate(rows):
+                result = {
+                    "index": int(row),
+                    "country": country,
+                    "fy": fy,
+                    "regimes": {
+                        regime: {key: values[i] for key, values in columns[regime].items()}
+                        for regime in regimes
+                    },
+                    "optimal_regime": regimes[best[i]],
+                    "savings": savings[i]
+                }
+                if "id" in scenarios[row]:
+                    result["id"] = scenarios[row]["id"]
+                results[row] = result
+        return results
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_tax_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            path = os.getenv("TAX_SLABS_PATH", os.path.join(_BACKEND_DIR, 'data', 'tax_slabs.json'))
+            _engine = TaxEngine.from_file(path)
+        return _engine
@@ -1,24 +1,20 @@
 # tax_processor.py
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-import json
+from services.llm import create_llm
+from services.tax_engine import get_tax_engine, DEFAULT_FY
+from services.deduction_classifier import DeductionClassifier
+from services.itr_generator import map_itr1
+from services.metrics import timed
+from services.single_flight import SingleFlight, content_key
+import threading
+
+# Duplicate submissions of the same return share one classification run
+_flights = SingleFlight("calculate_tax")
 
 class TaxProcessor:
     def __init__(self):
-        self.llm = ChatGroq(temperature=0, model_name="mixtral-8x7b-32768")
+        self.llm = create_llm("tax", model_name="mixtral-8x7b-32768", temperature=0)
         
-        self.tax_slabs = {
-            "INDIA": {
-                "FY2024": [
-                    {"min": 0, "max": 300000, "rate": 0},
-                    {"min": 300001, "max": 600000, "rate": 5},
-                    {"min": 600001, "max": 900000, "rate": 10},
-                    {"min": 900001, "max": 1200000, "rate": 15},
-                    {"min": 1200001, "max": 1500000, "rate": 20},
-                    {"min": 1500001, "rate": 30}
-                ]
-            }
-        }
+        self.engine = get_tax_engine()
         
         self.deduction_categories = {
             "80C": ["EPF", "PPF", "ELSS", "Insurance"],
@@ -26,55 +22,59 @@ class TaxProcessor:
             "24": ["Home Loan Interest"]
         }
 
-    def calculate_tax(self, financial_data, country="INDIA", fy="FY2024"):
-        # AI-powered deduction identification
-        deduction_prompt = PromptTemplate.from_template("""
-        Identify tax deductions from these transactions:
-        {transactions}
-        
-        Available deduction sections: {sections}
-        Return JSON: {{"deductions": [{{"section": "80C", "amount": 150000, "description": "EPF Contribution"}}]}}
-        """)
-        
-        chain = deduction_prompt | self.llm
-        deductions = json.loads(chain.invoke({
-            "transactions": json.dumps(financial_data['transactions']),
-            "sections": json.dumps(self.deduction_categories)
-        }).content)
+    def calculate_tax(self, financial_data, country="INDIA", fy=DEFAULT_FY, regime=None):
+        key = content_key(financial_data, country, fy, regime)
+        return _flights.do(key, self._calculate_tax, financial_data, country, fy, regime)
 
-        # Tax calculation logic
-        taxable_income = financial_data['total_income'] - sum(
-            [d['amount'] for d in deductions['deductions']]
-        )
-        
-        tax = 0
-        for slab in self.tax_slabs[country][fy]:
-            if taxable_income > slab['min']:
-                slab_max = slab.get('max', taxable_income)
-                slab_income = min(taxable_income, slab_max) - slab['min']
-                tax += slab_income * (slab['rate'] / 100)
+    def _calculate_tax(self, financial_data, country, fy, regime):
+        # Keyword rules first; only ambiguous payments reach the LLM
+        limits = {}
+        for name in self.engine.regimes(country, fy):
+            limits.update(self.engine.table(country, fy, name).deduction_limits)
+        classifier = DeductionClassifier(self.llm, self.deduction_categories, limits)
+        with timed("deduction_classification"):
+            deductions = classifier.classify(financial_data.get('transactions', []))
+
+        # Regime comparison on the vectorized engine; caps apply per section
+        by_section = {name: section['allowed'] for name, section in deductions['sections'].items()}
+        with timed("tax_computation"):
+            scenario = self.engine.simulate([{
+                "income": financial_data['total_income'],
+                "deductions": by_section,
+                "country": country,
+                "fy": fy
+            }])[0]
+        if "error" in scenario:
+            raise ValueError(scenario["error"])
+        regime = regime or financial_data.get('regime') or scenario["optimal_regime"]
+        chosen = scenario["regimes"][regime]
                 
         return {
-            "taxable_income": taxable_income,
-            "total_tax": tax,
+            "country": country,
+            "fy": fy,
+            "gross_income": float(financial_data['total_income']),
+            "taxable_income": chosen["taxable_income"],
+            "total_tax": chosen["total_tax"],
             "deductions": deductions,
-            "slabs_used": self.tax_slabs[country][fy]
+            "regime": regime,
+            "regimes": scenario["regimes"],
+            "optimal_regime": scenario["optimal_regime"],
+            "slabs_used": self.engine.table(country, fy, regime).slabs
         }
 
-    def generate_itr_form(self, tax_data):
-        # AI-powered form filling
-        form_prompt = PromptTemplate.from_template("""
-        Fill ITR form with:
-        {tax_data}
-        
-        Return JSON with form field mappings for ITR-1:
-        {{
-            "personal_info": {{...}},
-            "income_details": {{...}},
-            "deductions": {{...}},
-            "tax_payable": {tax}
-        }}
-        """)
-        
-        chain = form_prompt | self.llm
-        return json.loads(chain.invoke({"tax_data": tax_data}).content)
\ No newline at end of file
+    def generate_itr_form(self, tax_data, personal_info=None):
+        # Deterministic field mapping from calculate_tax output
+        return map_itr1(tax_data, personal_info)
+
+
+_processor = None
+_processor_lock = threading.Lock()
+
+
+def get_tax_processor():
+    # Stateless between calls, so one instance (and one LLM client) serves every request
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            _processor = TaxProcessor()
+        return _processor
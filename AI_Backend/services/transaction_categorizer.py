@@ -0,0 +1,199 @@
+# services/transaction_categorizer.py
+from langchain_core.prompts import PromptTemplate
+import asyncio
+import json
+import logging
+import os
+import re
+
+# Batch Categorization Template
+batch_categorization_template = """
+Categorize each of these transactions into one of these categories: {categories}
+
+Transactions (one JSON object per line, "id" identifies the row):
+{transactions}
+
+Return ONLY a JSON object mapping every id to its category name. Example:
+{{"0": "Food", "1": "Transport"}}
+"""
+
+batch_categorization_prompt = PromptTemplate.from_template(batch_categorization_template)
+
+
+class TransactionCategorizer:
+    def __init__(self, llm, categories, single_prompt, batch_size=None, cache=None):
+        self.llm = llm
+        self.cache = cache
+        self.categories = list(categories)
+        self.single_prompt = single_prompt
+        self.batch_size = max(1, int(batch_size or os.getenv("CATEGORIZATION_BATCH_SIZE", 50)))
+        # Case-insensitive lookup so "food" or "FOOD" still validates
+        self._category_lookup = {c.lower(): c for c in self.categories}
+        self.llm_calls = 0
+
+    def categorize(self, transactions):
+        """Attach a category to every transaction, one LLM call per batch"""
+        for index, category in self.categorize_batches(transactions):
+            transactions[index]["category"] = category
+        return transactions
+
+    def categorize_batches(self, transactions):
+        """Yield (row id, category) pairs: cache hits first, then batch by batch"""
+        hits, pending = self._plan(transactions)
+        yield from hits
+
+        for start in range(0, len(pending), self.batch_size):
+            group_batch = pending[start:start + self.batch_size]
+            batch = [(row_ids[0], transactions[row_ids[0]]) for _, row_ids in group_batch]
+            mapping = self._categorize_batch(batch)
+
+            learned = {}
+            for key, row_ids in group_batch:
+                category = mapping.get(row_ids[0])
+                if category is None:
+                    # Only rows the batch call failed on are re-sent individually
+                    category = self._categorize_single(transactions[row_ids[0]])
+                yield from self._fan_out(key, row_ids, category, learned)
+
+            if learned and self.cache:
+                self.cache.set_many(learned)
+
+    async def acategorize(self, transactions, concurrency=None):
+        """categorize on the event loop, with up to `concurrency` batches in flight"""
+        hits, pending = await asyncio.to_thread(self._plan, transactions)
+        for row_id, category in hits:
+            transactions[row_id]["category"] = category
+
+        semaphore = asyncio.Semaphore(int(concurrency or os.getenv("CATEGORIZATION_CONCURRENCY", 4)))
+
+        async def run(group_batch):
+            async with semaphore:
+                batch = [(row_ids[0], transactions[row_ids[0]]) for _, row_ids in group_batch]
+                mapping = await self._acategorize_batch(batch)
+
+                learned = {}
+                for key, row_ids in group_batch:
+                    category = mapping.get(row_ids[0])
+                    if category is None:
+                        category = await self._acategorize_single(transactions[row_ids[0]])
+                    for row_id, resolved in self._fan_out(key, row_ids, category, learned):
+                        transactions[row_id]["category"] = resolved
+
+                if learned and self.cache:
+                    await asyncio.to_thread(self.cache.set_many, learned)
+
+        await asyncio.gather(*(
+            run(pending[start:start + self.batch_size]) for start in range(0, len(pending), self.batch_size)
+        ))
+        return transactions
+
+    def _plan(self, transactions):
+        """Cache hits as (row id, category), and the groups still to categorize"""
+        # Rows sharing a fingerprint are sent once and fanned out afterwards
+        groups = {}
+        for row_id, txn in enumerate(transactions):
+            key = self.cache.make_key(txn) if self.cache else None
+            groups.setdefault(key if key else ("row", row_id), []).append(row_id)
+
+        cached = self.cache.get_many([k for k in groups if isinstance(k, str)]) if self.cache else {}
+        hits = []
+        pending = []
+        for key, row_ids in groups.items():
+            if key in cached:
+                hits.extend((row_id, cached[key]) for row_id in row_ids)
+            else:
+                pending.append((key, row_ids))
+        return hits, pending
+
+    def _fan_out(self, key, row_ids, category, learned):
+        if category is None:
+            category = "Other"
+        elif isinstance(key, str):
+            learned[key] = category
+        return [(row_id, category) for row_id in row_ids]
+
+    def _categorize_batch(self, batch):
+        """Send one batch and return a validated {row id: category} mapping"""
+        try:
+            chain = batch_categorization_prompt | self.llm
+            self.llm_calls += 1
+            raw = chain.invoke(self._batch_inputs(batch)).content
+            return self._parse_batch(raw, batch)
+        except Exception as e:
+            logging.error(f"Batch categorization failed: {str(e)}")
+            return {}
+
+    async def _acategorize_batch(self, batch):
+        try:
+            chain = batch_categorization_prompt | self.llm
+            self.llm_calls += 1
+            raw = (await chain.ainvoke(self._batch_inputs(batch))).content
+            return self._parse_batch(raw, batch)
+        except Exception as e:
+            logging.error(f"Batch categorization failed: {str(e)}")
+            return {}
+
+    def _batch_inputs(self, batch):
+        lines = [
+            json.dumps({
+                "id": row_id,
+                "date": txn.get("date"),
+                "description": txn.get("description"),
+                "amount": txn.get("amount"),
+                "type": txn.get("type")
+            })
+            for row_id, txn in batch
+        ]
+        return {"categories": ", ".join(self.categories), "transactions": "\n".join(lines)}
+
+    def _parse_batch(self, raw, batch):
+        json_match = re.search(r'\{.*\}', raw, re.DOTALL)
+        if not json_match:
+            raise ValueError("No JSON object in batch categorization response")
+        parsed = json.loads(json_match.group(0))
+
+        expected = {row_id for row_id, _ in batch}
+        mapping = {}
+        for key, value in parsed.items():
+            try:
+                row_id = int(key)
+            except (TypeError, ValueError):
+                continue
+            category = self._validate(value)
+            if row_id in expected and category:
+                mapping[row_id] = category
+        return mapping
+
+    def _categorize_single(self, txn):
+        try:
+            chain = self.single_prompt | self.llm
+            self.llm_calls += 1
+            category = chain.invoke(self._single_inputs(txn)).content.strip()
+        except Exception as e:
+            logging.error(f"Categorization failed: {str(e)}")
+            category = None
+        return self._validate(category)
+
+    async def _acategorize_single(self, txn):
+        try:
+            chain = self.single_prompt | self.llm
+            self.llm_calls += 1
+            category = (await chain.ainvoke(self._single_inputs(txn))).content.strip()
+        except Exception as e:
+            logging.error(f"Categorization failed: {str(e)}")
+            category = None
+        return self._validate(category)
+
+    def _single_inputs(self, txn):
+        return {
+            "date": txn.get("date"),
+            "description": txn.get("description"),
+            "amount": txn.get("amount"),
+            "type": txn.get("type"),
+            "categories": ", ".join(self.categories)
+        }
+
+    def _validate(self, category):
+        if not isinstance(category, str):
+            return None
+        return self._category_lookup.get(category.strip().strip('."\'').lower())
@@ -0,0 +1,219 @@
+# services/transaction_store.py
+from datetime import datetime, timezone
+import json
+import os
+import threading
+
+import numpy as np
+
+STORE_VERSION = 1
+
+# Columns holding repeated strings are stored as int32 codes into a dictionary
+DICTIONARY_COLUMNS = {
+    "category": "Category",
+    "subcategory": "Subcategory",
+    "mode": "Mode",
+    "direction": "Income/Expense",
+    "currency": "Currency"
+}
+
+_DATE_FORMATS = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+
+
+def _to_epoch(value):
+    for fmt in _DATE_FORMATS:
+        try:
+            return int(datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value}")
+
+
+def _field(record, key):
+    # The exported history nests "Income/Expense" as {"Income": {"Expense": ...}}
+    if key == "Income/Expense" and key not in record:
+        return (record.get("Income") or {}).get("Expense")
+    return record.get(key)
+
+
+class TransactionStore:
+    """Columnar, memory-mapped transaction history.
+
+    Every column is a .npy file opened with mmap_mode='r', rows are sorted by
+    date so date ranges are binary searches, and queries only ever touch
+    numpy arrays.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported transaction store version: {meta.get('version')}")
+
+        self.rows = meta["rows"]
+        self.dictionaries = meta["dictionaries"]
+        self._codes = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.dictionaries.items()
+        }
+
+        self.date = self._load("date")
+        self.amount = self._load("amount")
+        self.columns = {column: self._load(column) for column in DICTIONARY_COLUMNS}
+        self._note_bytes = self._load("note_bytes")
+        self._note_offsets = self._load("note_offsets")
+
+    @classmethod
+    def build(cls, records, path):
+        """Write records shaped like data/Daily Household Transactions.json to a store"""
+        os.makedirs(path, exist_ok=True)
+        n = len(records)
+        # Histories repeat timestamps heavily, so parse each distinct string once
+        parsed = {}
+        dates = np.fromiter(
+            (parsed[r["Date"]] if r["Date"] in parsed else parsed.setdefault(r["Date"], _to_epoch(r["Date"]))
+             for r in records),
+            dtype=np.int64, count=n
+        )
+        order = np.argsort(dates, kind="stable")
+
+        columns = {
+            "date": dates[order],
+            "amount": np.fromiter((float(r["Amount"] or 0) for r in records), dtype=np.float64, count=n)[order]
+        }
+        dictionaries = {}
+        for column, key in DICTIONARY_COLUMNS.items():
+            lookup = {}
+            codes = np.fromiter(
+                (lookup.setdefault(str(_field(r, key) or ""), len(lookup)) for r in records),
+                dtype=np.int32, count=n
+            )
+            columns[column] = codes[order]
+            dictionaries[column] = list(lookup)
+
+        notes = [str(records[i].get("Note") or "").encode("utf-8") for i in order]
+        columns["note_offsets"] = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(note) for note in notes], out=columns["note_offsets"][1:])
+        columns["note_bytes"] = np.frombuffer(b"".join(notes), dtype=np.uint8)
+
+        for name, values in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), values)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": STORE_VERSION, "rows": n, "dictionaries": dictionaries}, f)
+        return cls(path)
+
+    @classmethod
+    def import_json(cls, json_path, path):
+        with open(json_path) as f:
+            return cls.build(json.load(f), path)
+
+    def filter(self, start=None, end=None, category=None, mode=None, direction=None, **columns):
+        """Row selection as a slice over the date range plus an optional boolean mask.
+
+        start/end are datetimes, ISO dates or epoch seconds (end exclusive);
+        dictionary filters take a value or a list of values.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.date, self._epoch(start), side="left"))
+        hi = self.rows if end is None else int(np.searchsorted(self.date, self._epoch(end), side="left"))
+        selection = slice(lo, max(lo, hi))
+
+        mask = None
+        filters = {"category": category, "mode": mode, "direction": direction, **columns}
+        for column, values in filters.items():
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            # Lookup table over the dictionary codes instead of per-row comparisons
+            allowed = np.zeros(len(self.dictionaries[column]), dtype=bool)
+            allowed[[self._codes[column][v] for v in values if v in self._codes[column]]] = True
+            column_mask = allowed[self.columns[column][selection]]
+            mask = column_mask if mask is None else mask & column_mask
+        return selection, mask
+
+    def count(self, **filters):
+        selection, mask = self.filter(**filters)
+        return int(mask.sum()) if mask is not None else selection.stop - selection.start
+
+    def total(self, **filters):
+        selection, mask = self.filter(**filters)
+        amounts = self.amount[selection]
+        return float(amounts[mask].sum() if mask is not None else amounts.sum())
+
+    def sum_by(self, by, **filters):
+        """{value: summed amount} grouped on a dictionary column"""
+        selection, mask = self.filter(**filters)
+        codes = self.columns[by][selection]
+        amounts = self.amount[selection]
+        if mask is not None:
+            codes, amounts = codes[mask], amounts[mask]
+        sums = np.bincount(codes, weights=amounts, minlength=len(self.dictionaries[by]))
+        return {
+            self.dictionaries[by][code]: float(sums[code])
+            for code in np.flatnonzero(sums)
+        }
+
+    def records(self, limit=100, **filters):
+        """Materialize matching rows as dicts in the original JSON shape"""
+        selection, mask = self.filter(**filters)
+        indices = np.arange(selection.start, selection.stop)
+        if mask is not None:
+            indices = indices[mask]
+
+        records = []
+        for i in indices[:limit]:
+            record = {
+                "Date": datetime.fromtimestamp(int(self.date[i]), tz=timezone.utc).strftime("%d/%m/%Y %H:%M:%S"),
+                "Amount": float(self.amount[i]),
+                "Note": self._note(i)
+            }
+            for column, key in DICTIONARY_COLUMNS.items():
+                record[key] = self.dictionaries[column][self.columns[column][i]]
+            records.append(record)
+        return records
+
+    def _note(self, i):
+        start, stop = self._note_offsets[i], self._note_offsets[i + 1]
+        return self._note_bytes[start:stop].tobytes().decode("utf-8")
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    @staticmethod
+    def _epoch(value):
+        if isinstance(value, (int, float, np.integer)):
+            return int(value)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_transaction_store():
+    """Shared store, imported from the bundled history on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = os.getenv("TRANSACTION_STORE_PATH", os.path.join(_BACKEND_DIR, 'cache', 'transaction_store'))
+            if os.path.exists(os.path.join(path, "meta.json")):
+                _store = TransactionStore(path)
+            else:
+                _store = TransactionStore.import_json(
+                    os.path.join(_BACKEND_DIR, 'data', 'Daily Household Transactions.json'), path
+                )
+        return _store
+
+
+if __name__ == '__main__':
+    import sys
+
+    # python -m services.transaction_store <history.json> <store dir>
+    store = TransactionStore.import_json(sys.argv[1], sys.argv[2])
+    print(f"Imported {store.rows} transactions into {store.path}")
@@ -0,0 +1,47 @@
+from services.analysis_memo import AnalysisMemo, rolling_hash
+
+
+def _history(n):
+    return [{"id": i, "amount": 100 + i, "category": "Food"} for i in range(n)]
+
+
+def _memoized(history):
+    memo = AnalysisMemo()
+    result, delta, full_hash = memo.lookup("u1", history)
+    assert result is None and delta == history
+    memo.store("u1", history, full_hash, "analysis")
+    return memo
+
+
+def test_unchanged_history_is_a_hit():
+    history = _history(20)
+    memo = _memoized(history)
+    assert memo.lookup("u1", list(history)) == ("analysis", [], rolling_hash(history))
+
+
+def test_appended_rows_are_the_delta():
+    history = _history(20)
+    memo = _memoized(history)
+    extended = history + _history(23)[20:]
+    result, delta, full_hash = memo.lookup("u1", extended)
+    assert result == "analysis"
+    assert delta == extended[20:]
+    assert full_hash == rolling_hash(extended)
+
+
+def test_edited_earlier_row_is_a_miss():
+    history = _history(20)
+    memo = _memoized(history)
+    edited = [dict(row) for row in history]
+    edited[0]["amount"] = 999
+    result, delta, full_hash = memo.lookup("u1", edited)
+    assert result is None
+    assert delta == edited
+    assert full_hash == rolling_hash(edited)
+
+
+def test_removed_earlier_row_is_a_miss():
+    history = _history(20)
+    memo = _memoized(history)
+    shifted = history[1:] + _history(21)[20:]
+    assert memo.lookup("u1", shifted)[0] is None
@@ -0,0 +1,40 @@
+from io import BytesIO
+import zipfile
+
+from PyPDF2 import PdfReader
+
+from services.itr_generator import ITR1_LAYOUT, iter_itr_zip, map_itr1, render_itr_pdf
+
+TAX_DATA = {"gross_income": 1200000, "regime": "new", "total_tax": 71500}
+
+
+def _text(pdf_bytes):
+    reader = PdfReader(BytesIO(pdf_bytes))
+    assert len(reader.pages) == 1
+    return reader.pages[0].extract_text()
+
+
+def test_rendered_pdf_has_every_label_and_value():
+    form = map_itr1(TAX_DATA, {"name": "Asha Rao", "pan": "ABCDE1234F"})
+    text = _text(render_itr_pdf(form))
+    for _, _, label in ITR1_LAYOUT:
+        assert label in text
+    assert "Asha Rao" in text
+    assert "ABCDE1234F" in text
+    assert "1,200,000.00" in text
+    assert "71,500.00" in text
+
+
+def test_every_render_reuses_a_valid_template():
+    first = map_itr1(TAX_DATA, {"name": "First", "pan": "AAAAA1111A"})
+    second = map_itr1({**TAX_DATA, "total_tax": 0}, {"name": "Second", "pan": "BBBBB2222B"})
+    assert "First" in _text(render_itr_pdf(first))
+    text = _text(render_itr_pdf(second))
+    assert "Second" in text and "First" not in text
+
+
+def test_bulk_zip_entries_are_readable_pdfs():
+    archive = zipfile.ZipFile(BytesIO(b"".join(iter_itr_zip([{"tax_data": TAX_DATA}] * 3, window=2))))
+    assert archive.namelist() == ["ITR1_00000.pdf", "ITR1_00001.pdf", "ITR1_00002.pdf"]
+    for name in archive.namelist():
+        assert "D5 Total tax liability" in _text(archive.read(name))
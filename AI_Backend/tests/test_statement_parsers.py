@@ -0,0 +1,37 @@
+from services import statement_pipeline
+from services.statement_parsers import parse_segments
+
+PAGE_1 = """Opening Balance 5,000.00
+01/05/2024 Salary credit 75,000.00 Cr 80,000.00
+03/05/2024 Grocery store 2,000.00 Dr 78,000.00
+UPI/REF 1234 BIG BASKET
+Page 1 of 3"""
+
+# No layout parser reads this page, so it goes to the LLM
+PAGE_2 = """Transactions continued
+05/05/2024 | Electricity bill | 1,500.00 debit"""
+
+PAGE_3 = """07/05/2024 Rent paid 20,000.00 Dr 56,500.00
+09/05/2024 Refund 500.00 Cr 57,000.00"""
+
+
+def test_trailing_narration_is_kept_up_to_the_footer():
+    [(kind, transactions)] = parse_segments([PAGE_1])
+    assert kind == "parsed"
+    assert transactions[-1]["description"] == "Grocery store UPI/REF 1234 BIG BASKET"
+
+
+def test_llm_rows_keep_their_page_position(monkeypatch):
+    monkeypatch.setattr(statement_pipeline, "extract_pages", lambda pdf_bytes: [PAGE_1, PAGE_2, PAGE_3])
+    monkeypatch.setattr(statement_pipeline, "get_statement_llm", lambda: None)
+
+    def extract_chunks(chunks, llm, prompt):
+        assert len(chunks) == 1 and "Electricity bill" in chunks[0]["text"]
+        return [[{"date": "2024-05-05", "description": "Electricity bill", "amount": 1500.0, "type": "expense"}]]
+
+    monkeypatch.setattr(statement_pipeline, "extract_chunks", extract_chunks)
+
+    transactions = statement_pipeline.extract_statement(b"%PDF")
+    assert [t["date"] for t in transactions] == [
+        "2024-05-01", "2024-05-03", "2024-05-05", "2024-05-07", "2024-05-09"
+    ]